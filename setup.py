@@ -8,7 +8,8 @@ setup(
     entry_points={
         'vmpie.subsystems':
             [
-                'VCenter = vmpie.vcenter:VCenter'
+                'VCenter = vmpie.vcenter:VCenter',
+                'VCenterGroup = vmpie.vcenter_group:VCenterGroup'
             ],
         'console_scripts':
             [
@@ -23,5 +24,14 @@ setup(
         # 'pyvmomi_tools',
         'Pyro4',
         'urllib3'
-    ]
+    ],
+    extras_require={
+        'futures': [
+            'futures; python_version < "3"'
+        ],
+        'aio': [
+            'futures; python_version < "3"',
+            'trollius; python_version < "3"'
+        ]
+    }
 )
@@ -0,0 +1,30 @@
+import mock
+
+from pyVmomi import vim
+from pyVmomi import vmodl
+
+
+def object_content(obj, **properties):
+    """
+    Build a property collector result for an object.
+    """
+    return vmodl.query.PropertyCollector.ObjectContent(
+        obj=obj,
+        propSet=[vmodl.DynamicProperty(name=name, val=value) for name, value in properties.iteritems()]
+    )
+
+
+def retrieve_result(objects, token=None):
+    """
+    Build a page of RetrievePropertiesEx results.
+    """
+    return mock.Mock(objects=objects, token=token)
+
+
+def fake_vcenter():
+    """
+    Build a vCenter whose service content is a mock, so property collector calls can be scripted.
+    """
+    vcenter = mock.Mock()
+    vcenter._connection.content.rootFolder = vim.Folder("group-d1")
+    return vcenter
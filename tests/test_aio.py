@@ -0,0 +1,64 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+from pyVmomi import vim
+
+from vmpie import aio
+from vmpie import plugin
+from vmpie import task_waiter
+
+
+class EchoPlugin(plugin.Plugin):
+    _name = "echo"
+
+    def rename(self, name):
+        return threading.current_thread().name, name
+
+    def get_self(self):
+        return self
+
+
+class AsyncProxyTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = aio.asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(self.executor.shutdown)
+
+        self.vm = mock.Mock()
+        self.plugin = EchoPlugin(self.vm)
+        self.proxy = aio._AsyncProxy(self.plugin, self.loop, self.executor)
+
+    def test_calls_run_on_the_executor(self):
+        thread_name, name = self.loop.run_until_complete(self.proxy.rename("new"))
+
+        self.assertEqual(name, "new")
+        self.assertNotEqual(thread_name, threading.current_thread().name)
+
+    def test_results_are_wrapped(self):
+        result = self.loop.run_until_complete(self.proxy.get_self())
+
+        self.assertIsInstance(result, aio._AsyncProxy)
+        self.assertIs(result._target, self.plugin)
+
+    def test_wait_for_task_uses_the_vcenter_of_the_plugin_vm(self):
+        task = vim.Task("task-1")
+
+        def add(tasks, callback):
+            result = task_waiter.TaskResult(tasks[0])
+            result.state, result.result = vim.TaskInfo.State.success, "done"
+            callback(result)
+
+        self.vm.vcenter.task_waiter.add.side_effect = add
+
+        with mock.patch.object(aio.decorators.utils, "get_vcenter") as get_vcenter:
+            self.assertEqual(self.loop.run_until_complete(self.proxy.wait_for_task(task)), "done")
+
+        self.assertFalse(get_vcenter.called)
+        self.assertEqual(self.vm.vcenter.task_waiter.add.call_args[0][0], [task])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import bulk
+
+
+class FakeWaiter(object):
+    """
+    A task waiter which completes a single running task per poll, in the order the tasks were added.
+    """
+    def __init__(self, vcenter):
+        self.running = []
+        self.failed = set()
+
+    def add(self, tasks, callback=None):
+        self.running.extend(tasks)
+
+    def poll(self, max_wait_seconds=0):
+        task = self.running.pop(0)
+        result = bulk.task_waiter.TaskResult(task)
+        if task._moId in self.failed:
+            result.state, result.error = vim.TaskInfo.State.error, RuntimeError(task._moId)
+        else:
+            result.state, result.result = vim.TaskInfo.State.success, task._moId
+        return [result]
+
+    def pop_result(self, task):
+        pass
+
+    def close(self):
+        pass
+
+
+class RunTest(unittest.TestCase):
+    def setUp(self):
+        self.vms = [mock.Mock(_moid="vm-{0}".format(index)) for index in range(6)]
+        for vm in self.vms:
+            vm.name = vm._moid
+        self.waiter = FakeWaiter(None)
+        self.started = []
+
+        patcher = mock.patch.object(bulk.task_waiter, "TaskWaiter", return_value=self.waiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def op(self, vm):
+        self.started.append((vm._moid, [task._moId for task in self.waiter.running]))
+        return vim.Task("task-" + vm._moid)
+
+    def test_max_in_flight(self):
+        results = bulk.run(self.vms, self.op, max_in_flight=2, vcenter=mock.Mock())
+
+        self.assertTrue(all(result.is_success for result in results))
+        self.assertEqual(["task-vm-{0}".format(index) for index in range(6)], [result.result for result in results])
+        self.assertTrue(all(len(running) < 2 for _, running in self.started))
+
+    def test_per_host_limit(self):
+        placements = dict((vm._moid, ("host-{0}".format(index % 2), [])) for index, vm in enumerate(self.vms))
+
+        with mock.patch.object(bulk, "_get_placements", return_value=placements):
+            bulk.run(self.vms, self.op, max_in_flight=10, per_host_limit=1, vcenter=mock.Mock())
+
+        for moid, running in self.started:
+            host = placements[moid][0]
+            self.assertEqual([], [task for task in running if placements[task[len("task-"):]][0] == host])
+
+        # The first vm of every host starts right away, along with the running vm of the other host
+        self.assertEqual(("vm-1", ["task-vm-0"]), self.started[1])
+
+    def test_errors(self):
+        self.waiter.failed.add("task-vm-1")
+
+        def op(vm):
+            if vm._moid == "vm-2":
+                raise RuntimeError("cannot start")
+            return self.op(vm)
+
+        callback = mock.Mock()
+        results = bulk.run(self.vms[:3], op, callback=callback, vcenter=mock.Mock())
+
+        self.assertEqual([bulk.SUCCESS, bulk.ERROR, bulk.ERROR], [result.state for result in results])
+        self.assertEqual(3, callback.call_count)
+
+    def test_operations_without_a_task(self):
+        def op(vm):
+            if vm._moid == "vm-0":
+                return None
+            if vm._moid == "vm-1":
+                # ie: an operation called with future=True
+                return mock.Mock(spec=["result"])
+            return self.op(vm)
+
+        results = bulk.run(self.vms[:3], op, vcenter=mock.Mock())
+
+        self.assertEqual([bulk.SUCCESS, bulk.ERROR, bulk.SUCCESS], [result.state for result in results])
+        self.assertIsInstance(results[1].error, TypeError)
+
+    def test_invalid_limits(self):
+        for kwargs in [{"max_in_flight": 0}, {"per_host_limit": 0}, {"per_datastore_limit": -1}]:
+            self.assertRaises(ValueError, bulk.run, self.vms, self.op, vcenter=mock.Mock(), **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import collector
+from tests.helpers import object_content, retrieve_result, fake_vcenter
+
+
+class IterPagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.vcenter = fake_vcenter()
+        self.property_collector = self.vcenter._connection.content.propertyCollector
+
+    def test_follows_tokens_until_the_last_page(self):
+        first = [object_content(vim.VirtualMachine("vm-1"), name="a")]
+        second = [object_content(vim.VirtualMachine("vm-2"), name="b")]
+        self.property_collector.RetrievePropertiesEx.return_value = retrieve_result(first, token="t1")
+        self.property_collector.ContinueRetrievePropertiesEx.return_value = retrieve_result(second)
+
+        pages = list(collector.iter_pages(mock.sentinel.spec, page_size=1, vcenter=self.vcenter))
+
+        self.assertEqual([first, second], pages)
+        self.property_collector.ContinueRetrievePropertiesEx.assert_called_once_with(token="t1")
+        self.assertFalse(self.property_collector.CancelRetrievePropertiesEx.called)
+
+    def test_page_size_is_sent_as_max_objects(self):
+        self.property_collector.RetrievePropertiesEx.return_value = retrieve_result([])
+
+        list(collector.iter_pages(mock.sentinel.spec, page_size=7, vcenter=self.vcenter))
+
+        options = self.property_collector.RetrievePropertiesEx.call_args[1]["options"]
+        self.assertEqual(7, options.maxObjects)
+
+    def test_no_results(self):
+        self.property_collector.RetrievePropertiesEx.return_value = None
+
+        self.assertEqual([], list(collector.iter_pages(mock.sentinel.spec, vcenter=self.vcenter)))
+
+    def test_stopping_early_cancels_the_remaining_results(self):
+        self.property_collector.RetrievePropertiesEx.return_value = retrieve_result([], token="t1")
+
+        pages = collector.iter_pages(mock.sentinel.spec, vcenter=self.vcenter)
+        next(pages)
+        pages.close()
+
+        self.property_collector.CancelRetrievePropertiesEx.assert_called_once_with(token="t1")
+
+
+class IterContainerPropertiesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.vcenter = fake_vcenter()
+        self.content = self.vcenter._connection.content
+        self.view = self.content.viewManager.CreateContainerView.return_value
+        patcher = mock.patch.object(collector, "create_container_filter_spec")
+        self.create_filter_spec = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_yields_objects_with_their_properties(self):
+        vm = vim.VirtualMachine("vm-1")
+        self.content.propertyCollector.RetrievePropertiesEx.return_value = retrieve_result(
+            [object_content(vm, name="a")])
+
+        pages = list(collector.iter_container_properties([vim.VirtualMachine], ["name"], vcenter=self.vcenter))
+
+        self.assertEqual([[(vm, {"name": "a"})]], pages)
+        self.create_filter_spec.assert_called_once_with(self.view, [vim.VirtualMachine], ["name"])
+        self.view.DestroyView.assert_called_once_with()
+
+    def test_view_is_destroyed_when_stopping_early(self):
+        self.content.propertyCollector.RetrievePropertiesEx.return_value = retrieve_result([], token="t1")
+
+        pages = collector.iter_container_properties([vim.VirtualMachine], ["name"], vcenter=self.vcenter)
+        next(pages)
+        pages.close()
+
+        self.view.DestroyView.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
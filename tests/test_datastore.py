@@ -0,0 +1,86 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import datastore
+
+
+class GetVmsByDatastoreTest(unittest.TestCase):
+    def setUp(self):
+        self.vcenter = mock.Mock()
+        self.datastores = [vim.Datastore("datastore-1"), vim.Datastore("datastore-2")]
+        self.vm = vim.VirtualMachine("vm-1")
+        self.objects = {
+            "datastore-1": (self.datastores[0], {"name": "local", "vm": [self.vm]}),
+            "datastore-2": (self.datastores[1], {"name": "local", "vm": []}),
+            "vm-1": (self.vm, {"name": "vm_name"}),
+        }
+        self.calls = []
+
+        patcher = mock.patch.object(datastore, "collector")
+        self.collector = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.collector.retrieve_datastore_vms.side_effect = lambda *args, **kwargs: \
+            self.calls.append("collect") or self.objects
+        self.collector.retrieve_container_properties.return_value = [(ds, {}) for ds in self.datastores]
+
+        patcher = mock.patch.object(datastore, "refresh_storage_info")
+        self.refresh_storage_info = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.refresh_storage_info.side_effect = lambda *args, **kwargs: self.calls.append("refresh")
+
+    def test_keyed_by_datastore_moid(self):
+        vms = datastore.get_vms_by_datastore(vcenter=self.vcenter)
+
+        self.assertEqual(["datastore-1", "datastore-2"], sorted(vms))
+        self.assertEqual(["vm_name"], [vm.name for vm in vms["datastore-1"]])
+        self.assertIs(self.vcenter, vms["datastore-1"][0]._vcenter)
+        self.assertFalse(self.refresh_storage_info.called)
+
+    def test_vms_without_a_name_are_skipped(self):
+        orphaned, deleted = vim.VirtualMachine("vm-2"), vim.VirtualMachine("vm-3")
+        self.objects["datastore-1"][1]["vm"].extend([orphaned, deleted])
+        self.objects["vm-2"] = (orphaned, {})
+
+        vms = datastore.get_vms_by_datastore(vcenter=self.vcenter)
+
+        self.assertEqual(["vm_name"], [vm.name for vm in vms["datastore-1"]])
+
+    def test_refresh_before_collecting(self):
+        datastore.get_vms_by_datastore(refresh=True, vcenter=self.vcenter)
+
+        self.assertEqual(["refresh", "refresh", "collect"], self.calls)
+        self.refresh_storage_info.assert_any_call(self.datastores[1], vcenter=self.vcenter)
+
+
+class RefreshStorageInfoTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(datastore._storage_refresh_times, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refreshed_once_per_ttl_and_vcenter(self):
+        first, second = mock.Mock(), mock.Mock()
+        pyVmomiDatastore = mock.Mock(_moId="datastore-1")
+
+        datastore.refresh_storage_info(pyVmomiDatastore, vcenter=first)
+        datastore.refresh_storage_info(pyVmomiDatastore, vcenter=first)
+        self.assertEqual(1, pyVmomiDatastore.RefreshDatastoreStorageInfo.call_count)
+
+        datastore.refresh_storage_info(pyVmomiDatastore, vcenter=second)
+        datastore.refresh_storage_info(pyVmomiDatastore, ttl=0, vcenter=first)
+        self.assertEqual(3, pyVmomiDatastore.RefreshDatastoreStorageInfo.call_count)
+
+    def test_failed_refresh_is_retried(self):
+        vcenter = mock.Mock()
+        pyVmomiDatastore = mock.Mock(_moId="datastore-1")
+        pyVmomiDatastore.RefreshDatastoreStorageInfo.side_effect = [RuntimeError, None]
+
+        self.assertRaises(RuntimeError, datastore.refresh_storage_info, pyVmomiDatastore, vcenter=vcenter)
+        datastore.refresh_storage_info(pyVmomiDatastore, vcenter=vcenter)
+        self.assertEqual(2, pyVmomiDatastore.RefreshDatastoreStorageInfo.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
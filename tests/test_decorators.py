@@ -0,0 +1,78 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import decorators
+from vmpie import session_pool
+from vmpie import vcenter
+from vmpie import vmpie_exceptions
+
+
+class Plugin(object):
+    def __init__(self, vm):
+        self.vm = vm
+
+    @decorators.connected
+    def operation(self):
+        return "done"
+
+
+class ConnectedTest(unittest.TestCase):
+    @mock.patch.object(decorators.utils, "get_vcenter")
+    def test_uses_the_vcenter_of_the_vm(self, get_vcenter):
+        vm = mock.Mock()
+
+        self.assertEqual("done", Plugin(vm).operation())
+
+        vm.vcenter.mark_active.assert_called_once_with()
+        self.assertFalse(get_vcenter.called)
+
+    @mock.patch.object(decorators.utils, "get_vcenter")
+    def test_raises_when_the_vcenter_is_disconnected(self, get_vcenter):
+        vm = mock.Mock()
+        vm.vcenter.is_connected.return_value = False
+
+        self.assertRaises(vmpie_exceptions.NotConnectedException, Plugin(vm).operation)
+        self.assertFalse(get_vcenter.called)
+
+    @mock.patch.object(decorators.utils, "get_vcenter")
+    def test_defaults_to_the_connected_vcenter(self, get_vcenter):
+        @decorators.connected
+        def operation():
+            return "done"
+
+        self.assertEqual("done", operation())
+        get_vcenter.return_value.mark_active.assert_called_once_with()
+
+    def test_expired_pooled_sessions_are_not_replayed(self):
+        vc = vcenter.VCenter()
+        vc._connection, vc._user, vc._passwd = mock.Mock(), "user", "cGFzc3dk"
+        vc.is_connected = mock.Mock(return_value=True)
+        vc._session_pool = session_pool.SessionPool(lambda: mock.Mock(), size=3)
+        expired = [vc._session_pool.checkout(), vc._session_pool.checkout()]
+        for session in expired:
+            vc._session_pool.checkin(session)
+        used = []
+
+        class VirtualMachine(object):
+            vcenter = vc
+
+            @decorators.connected
+            def operation(self):
+                with self.vcenter.session() as session:
+                    used.append(session)
+                    if session in expired:
+                        raise vim.fault.NotAuthenticated()
+                return "done"
+
+        self.assertEqual("done", VirtualMachine().operation())
+
+        self.assertEqual(2, len(used))
+        self.assertNotIn(used[-1], expired)
+        self.assertTrue(all(session.closed for session in expired))
+        vc._connection.content.sessionManager.Login.assert_called_once_with(userName="user", password="passwd")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import name_index
+
+
+def change(name, value, op="assign"):
+    change = mock.Mock(val=value, op=op)
+    change.name = name
+    return change
+
+
+def update_set(*object_updates):
+    return mock.Mock(version="1", truncated=False, filterSet=[mock.Mock(objectSet=list(object_updates))])
+
+
+def enter(obj, name, parent):
+    return mock.Mock(obj=obj, kind="enter", changeSet=[change("name", name), change("parent", parent)])
+
+
+class NameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = name_index.NameIndex(mock.Mock())
+        self.root = vim.Folder("group-v1")
+        self.folder = vim.Folder("group-v2")
+        self.vm = vim.VirtualMachine("vm-1")
+        self.vapp = vim.VirtualApp("resgroup-v1")
+        self.index._apply(update_set(
+            enter(self.root, "vm", None),
+            enter(self.folder, "apps", self.root),
+            enter(self.vm, "app", self.folder),
+            enter(self.vapp, "app", self.root),
+        ))
+
+    def test_lookup_by_type(self):
+        self.assertIs(self.vm, self.index.lookup("app", [vim.VirtualMachine]))
+        self.assertIs(self.vapp, self.index.lookup("app", [vim.ResourcePool]))
+        self.assertIsNone(self.index.lookup("app", [vim.Datastore]))
+
+    def test_lookup_in_folder(self):
+        self.assertIs(self.vm, self.index.lookup("app", [vim.VirtualMachine, vim.ResourcePool], folder=self.folder))
+        self.assertIsNone(self.index.lookup("app", [vim.ResourcePool], folder=self.folder))
+
+    def test_covers_subclasses(self):
+        self.assertTrue(self.index.covers([vim.VirtualApp, vim.VirtualMachine]))
+        self.assertFalse(self.index.covers([vim.HostSystem]))
+        self.assertFalse(self.index.covers([]))
+
+    def test_rename_and_leave(self):
+        self.index._apply(update_set(mock.Mock(obj=self.vm, kind="modify", changeSet=[change("name", "db")])))
+        self.assertIsNone(self.index.lookup("app", [vim.VirtualMachine]))
+        self.assertIs(self.vm, self.index.lookup("db", [vim.VirtualMachine]))
+
+        self.index._apply(update_set(mock.Mock(obj=self.vm, kind="leave", changeSet=[])))
+        self.assertIsNone(self.index.lookup("db", [vim.VirtualMachine]))
+        self.assertIsNone(self.index.get_parent(self.vm))
+
+    def test_listener_death_releases_resources(self):
+        property_collector, view = mock.Mock(), mock.Mock()
+        property_collector.WaitForUpdatesEx.side_effect = RuntimeError("session expired")
+        self.index._property_collector, self.index._view = property_collector, view
+        self.index._running = True
+
+        self.index._listener_worker()
+
+        self.assertFalse(self.index.is_alive())
+        property_collector.DestroyPropertyCollector.assert_called_once_with()
+        view.DestroyView.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import parent_cache
+
+
+class ParentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.vcenter = mock.Mock()
+        self.cache = parent_cache.ParentCache(self.vcenter)
+        self.root = vim.Folder("group-v1")
+        self.folder = vim.Folder("group-v2")
+        self.vm = vim.VirtualMachine("vm-1")
+        self.cache._entries = {
+            "group-v1": ("vm", vim.Datacenter("datacenter-1")),
+            "group-v2": ("folder", self.root),
+            "vm-1": ("vm_name", self.folder),
+        }
+
+    def test_path(self):
+        self.assertEqual("folder/vm_name", self.cache.path(self.vm))
+
+    def test_invalidate_removes_descendants(self):
+        self.cache.invalidate(self.folder)
+        self.assertEqual(["group-v1"], list(self.cache._entries))
+
+    def test_invalidate_after_waits_for_the_task(self):
+        rename_task = vim.Task("task-1")
+        self.cache.invalidate_after(rename_task, self.folder)
+
+        (tasks, callback), _ = self.vcenter.task_waiter.add.call_args
+        self.assertEqual([rename_task], tasks)
+        self.assertIn("group-v2", self.cache._entries)
+
+        callback(mock.Mock())
+        self.assertNotIn("group-v2", self.cache._entries)
+        self.assertNotIn("vm-1", self.cache._entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
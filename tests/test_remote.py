@@ -0,0 +1,216 @@
+import threading
+import unittest
+
+import mock
+
+from vmpie.builtin_plugins import remote
+
+
+def fake_vm(host, moid):
+    return mock.Mock(_moid=moid, vcenter=mock.Mock(_host=host))
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = remote._ConnectionPool()
+        patcher = mock.patch.object(remote, "unpack", return_value="2.7.18")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_vms_of_different_vcenters_are_kept_apart(self):
+        with mock.patch.object(self.pool, "_connect", side_effect=lambda: mock.Mock()):
+            first = self.pool.get(fake_vm("vc-1", "vm-1"))
+            second = self.pool.get(fake_vm("vc-2", "vm-1"))
+
+            self.assertIsNot(first, second)
+            self.assertIs(first, self.pool.get(fake_vm("vc-1", "vm-1")))
+
+    def test_concurrent_gets_connect_once(self):
+        connecting = threading.Event()
+        release = threading.Event()
+
+        def connect():
+            # Only the first connection is slow
+            if not connecting.is_set():
+                connecting.set()
+                release.wait(5)
+            return mock.Mock()
+
+        vm = fake_vm("vc", "vm-1")
+        with mock.patch.object(self.pool, "_connect", side_effect=connect) as pool_connect:
+            threads = [threading.Thread(target=self.pool.get, args=(vm,)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            connecting.wait(5)
+
+            # A slow connection doesn't block the connections to other virtual machines
+            other = self.pool.get(fake_vm("vc", "vm-2"))
+            self.assertFalse(release.is_set())
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(2, pool_connect.call_count)
+        self.assertIsNot(other, self.pool.get(vm))
+
+
+class DescribeTypeTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = remote._ConnectionPool()
+        self.vm = fake_vm("vc", "vm-1")
+        self.connection = mock.Mock()
+        self.connection.describe_type.side_effect = lambda type_id: ("Type{0}".format(type_id), "module", ())
+        self.pool._connections[self.pool._get_key(self.vm)] = self.connection
+
+    def test_described_once_per_epoch(self):
+        self.assertEqual("Type1", self.pool.describe_type(self.vm, 1, 100)[0])
+        self.pool.describe_type(self.vm, 1, 100)
+        self.assertEqual(1, self.connection.describe_type.call_count)
+
+        # The guest server restarted and reuses the type id for another type
+        self.connection.describe_type.side_effect = lambda type_id: ("Other", "module", ())
+        self.assertEqual("Other", self.pool.describe_type(self.vm, 1, 200)[0])
+
+    def test_reconnect_forgets_descriptions(self):
+        self.pool.describe_type(self.vm, 1, 100)
+        self.pool.release(self.vm)
+
+        with mock.patch.object(self.pool, "_connect", return_value=self.connection), \
+                mock.patch.object(remote, "unpack", return_value="2.7.18"):
+            self.pool.describe_type(self.vm, 1, 100)
+
+        self.assertEqual(2, self.connection.describe_type.call_count)
+
+
+class RemoteObject(object):
+    def __init__(self, oid):
+        self._RemoteObject__oid = oid
+
+
+class ReleaseTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = remote._ConnectionPool()
+        self.vm = fake_vm("vc", "vm-1")
+        self.connection = mock.Mock()
+        self.pool._connections[self.pool._get_key(self.vm)] = self.connection
+
+        patcher = mock.patch.object(remote.consts, "REMOTE_RELEASE_FLUSH_INTERVAL", 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_flushed_by_the_flusher_once_collected(self):
+        remote_object = self.pool.track(self.vm, RemoteObject(7))
+        flusher = self.pool._flusher
+        self.assertIsNotNone(flusher)
+
+        del remote_object
+        flusher.join(5)
+
+        self.connection.release.assert_called_once_with([7])
+        self.assertIsNone(self.pool._flusher)
+
+    def test_released_in_a_single_call_per_vm(self):
+        self.pool._released.extend([(self.pool._get_key(self.vm), 1), (self.pool._get_key(self.vm), 2)])
+        self.pool.flush_releases()
+
+        self.connection.release.assert_called_once_with([1, 2])
+
+    def test_kept_until_reconnected(self):
+        self.pool.release(self.vm)
+        self.pool._released.append((self.pool._get_key(self.vm), 3))
+        self.pool.flush_releases()
+        self.assertFalse(self.connection.release.called)
+
+        connection = mock.Mock()
+        with mock.patch.object(self.pool, "_connect", return_value=connection), \
+                mock.patch.object(remote, "unpack", return_value="2.7.18"):
+            self.pool.get(self.vm)
+
+        self.pool.flush_releases()
+        connection.release.assert_called_once_with([3])
+
+
+class RemoteModuleTest(unittest.TestCase):
+    def setUp(self):
+        # Shared by the virtual machines, as if they run the same python build
+        self.kinds = {}
+        patcher = mock.patch.object(remote.connection_pool, "get_attribute_kinds", return_value=self.kinds)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_vm(self, results):
+        vm = fake_vm("vc", "vm-1")
+        vm._pyro_daemon.evaluate.side_effect = lambda code: (remote.VALUE_LABEL, results[code])
+        vm._pyro_daemon.execute.return_value = None
+        return vm
+
+    def resolve(self, name):
+        return remote.RESOLVE_ATTRIBUTE_EXPRESSION.format(name=name)
+
+    def test_kinds_are_resolved_once_per_build(self):
+        first = self.fake_vm({self.resolve("os.path"): (remote.SUBMODULE_KIND, None),
+                              self.resolve("os.getcwd"): (remote.CALLABLE_KIND, None)})
+        module = remote._RemoteModule("os", first)
+
+        self.assertIsInstance(module.path, remote._RemoteSubModule)
+        self.assertIs(module.path, module.path)
+        self.assertIsInstance(module.getcwd, remote._RemoteMethod)
+        self.assertEqual(2, first._pyro_daemon.evaluate.call_count)
+
+        second = self.fake_vm({})
+        self.assertIsInstance(remote._RemoteModule("os", second).path, remote._RemoteSubModule)
+        self.assertFalse(second._pyro_daemon.evaluate.called)
+
+    def test_values_are_not_cached(self):
+        vm = self.fake_vm({self.resolve("os.sep"): (remote.VALUE_KIND, "/"), "os.sep": "\\"})
+        module = remote._RemoteModule("os", vm)
+
+        self.assertEqual("/", module.sep)
+        self.assertEqual("\\", module.sep)
+        self.assertEqual(remote.VALUE_KIND, self.kinds["os.sep"])
+
+    def test_prefetch_keeps_constants(self):
+        manifest = [("sep", remote.VALUE_KIND, True, "/"), ("environ", remote.VALUE_KIND, False, None),
+                    ("getcwd", remote.CALLABLE_KIND, False, None)]
+        vm = self.fake_vm({remote.MODULE_MANIFEST_EXPRESSION.format(name="os"): manifest})
+        module = remote._RemoteModule("os", vm)
+
+        module.prefetch(constants=True)
+
+        self.assertEqual("/", module.sep)
+        self.assertIsInstance(module.getcwd, remote._RemoteMethod)
+        self.assertEqual(1, vm._pyro_daemon.evaluate.call_count)
+        self.assertEqual(remote.VALUE_KIND, self.kinds["os.environ"])
+
+
+class ClassProxyTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(remote._RemoteObject._class_proxy_cache, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.vm = fake_vm("vc", "vm-1")
+
+    def remote_object(self, oid, methods):
+        return remote._RemoteObject(vm=self.vm, oid=oid, class_name="Service", module_name="service",
+                                    methods=methods)
+
+    def test_same_methods_share_a_class(self):
+        methods = [("run", "Run the service."), ("stop", None)]
+        first, second = self.remote_object(1, methods), self.remote_object(2, list(methods))
+
+        self.assertIs(type(first), type(second))
+        self.assertEqual("Run the service.", type(first).run.__doc__)
+        self.assertIsNot(type(first), type(self.remote_object(3, methods[:1])))
+        self.assertEqual(2, len(remote._RemoteObject._class_proxy_cache))
+
+    def test_methods_are_called_remotely(self):
+        self.vm._pyro_daemon.callattr.return_value = (remote.VALUE_LABEL, "started")
+        service = self.remote_object(1, [("run", None)])
+
+        self.assertEqual("started", service.run(5))
+        _, name, args, kwargs = self.vm._pyro_daemon.callattr.call_args[0]
+        self.assertEqual(("run", [(remote.VALUE_LABEL, 5)], {}), (name, args, kwargs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import mock
+
+from vmpie import server
+
+
+def make_server():
+    # Pyro4 reads its configuration once, possibly before vmpie.server set the environment
+    with mock.patch.object(server.config, "SERIALIZERS_ACCEPTED", set(["pickle"])):
+        return server.Server()
+
+
+class Service(object):
+    def run(self):
+        """Run the service."""
+
+
+class Hook(object):
+    def fire(self):
+        pass
+
+
+class TypeIdTest(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server()
+
+    def test_instances_of_a_class_share_a_type_id(self):
+        type_id = self.server.get_type_id(Service())
+
+        self.assertEqual(type_id, self.server.get_type_id(Service()))
+        class_name, module_name, methods = self.server.describe_type(type_id)
+        self.assertEqual("Service", class_name)
+        self.assertIn(("run", "Run the service."), methods)
+
+    def test_instance_callables_get_their_own_type_id(self):
+        service = Service()
+        service.fire = Hook().fire
+
+        type_id = self.server.get_type_id(service)
+
+        self.assertNotEqual(self.server.get_type_id(Service()), type_id)
+        self.assertIn("fire", [name for name, _ in self.server.describe_type(type_id)[2]])
+
+    def test_references_carry_the_server_epoch(self):
+        label, (handle, type_id, epoch) = self.server.pack(Service())
+
+        self.assertEqual(server.REF_LABEL, label)
+        self.assertEqual(self.server.epoch, epoch)
+        self.assertIsInstance(self.server.local_storage[handle], Service)
+
+
+class CodeCacheTest(unittest.TestCase):
+    def test_repeated_expressions_are_compiled_once(self):
+        srv = make_server()
+
+        self.assertEqual((server.VALUE_LABEL, 2), srv.evaluate("1 + 1"))
+        self.assertEqual((server.VALUE_LABEL, 2), srv.evaluate(" 1 + 1\n"))
+        srv.execute("import os")
+        srv.execute("import os")
+
+        stats = srv.code_cache.stats()
+        self.assertEqual(2, stats["hits"])
+        self.assertEqual(2, stats["misses"])
+
+    def test_least_recently_used_code_is_evicted(self):
+        cache = server.CodeCache(max_size=2)
+        first = cache.compile("1", "eval")
+        cache.compile("2", "eval")
+        self.assertIs(first, cache.compile("1", "eval"))
+        cache.compile("3", "eval")
+
+        self.assertIs(first, cache.compile("1", "eval"))
+        self.assertEqual(2, cache.stats()["size"])
+        cache.compile("2", "eval")
+        self.assertEqual(4, cache.misses)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import mock
+
+from vmpie import session_cache
+
+
+class SessionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+        patcher = mock.patch.object(session_cache.consts, "SESSION_CACHE_FOLDER", os.path.join(self.folder, "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.stub = mock.Mock()
+        patcher = mock.patch.object(session_cache, "_create_stub", return_value=self.stub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(session_cache, "SetSi")
+        self.set_si = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_saved_per_user_and_private(self):
+        session_cache.save("vc", "user", "cookie")
+
+        self.assertEqual("cookie", session_cache.load("vc", "user"))
+        self.assertIsNone(session_cache.load("vc", "other"))
+        mode = os.stat(session_cache._get_cache_path("vc", "user")).st_mode
+        self.assertEqual(0, mode & (stat.S_IRWXG | stat.S_IRWXO))
+
+    def test_restores_a_valid_session(self):
+        session_cache.save("vc", "user", "cookie")
+        self.stub.InvokeAccessor.return_value = mock.Mock()
+
+        connection = session_cache.restore("vc", "user")
+
+        self.assertIs(self.stub, connection._stub)
+        self.assertEqual("cookie", self.stub.cookie)
+        self.set_si.assert_called_once_with(connection)
+
+    def test_expired_session_is_removed(self):
+        session_cache.save("vc", "user", "cookie")
+        self.stub.InvokeAccessor.return_value = None
+
+        self.assertIsNone(session_cache.restore("vc", "user"))
+        self.assertIsNone(session_cache.load("vc", "user"))
+        self.assertFalse(self.set_si.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import threading
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import session_pool
+from vmpie import vmpie_exceptions
+
+
+class SessionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.login = mock.Mock(side_effect=lambda: mock.Mock())
+        self.pool = session_pool.SessionPool(self.login, size=2)
+
+    def logouts(self, session):
+        return session._connection.content.sessionManager.Logout.call_count
+
+    def test_returned_sessions_are_reused(self):
+        with self.pool.session() as first:
+            pass
+        with self.pool.session() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(1, self.login.call_count)
+
+    def test_exhausted_pool_waits_for_a_session(self):
+        first, second = self.pool.checkout(), self.pool.checkout()
+        self.assertRaises(vmpie_exceptions.NotConnectedException, self.pool.checkout, timeout=0.01)
+
+        threading.Timer(0.05, self.pool.checkin, args=(second,)).start()
+        self.assertIs(second, self.pool.checkout(timeout=5))
+        self.assertEqual(2, self.login.call_count)
+
+    def test_expired_session_is_discarded(self):
+        try:
+            with self.pool.session() as session:
+                raise vim.fault.NotAuthenticated()
+        except vim.fault.NotAuthenticated:
+            pass
+
+        self.assertEqual(1, self.logouts(session))
+        self.assertIsNot(session, self.pool.checkout())
+
+    def test_close_logs_out_checked_out_sessions_on_return(self):
+        idle, busy = self.pool.checkout(), self.pool.checkout()
+        self.pool.checkin(idle)
+        self.pool.close()
+
+        self.assertEqual(1, self.logouts(idle))
+        self.assertEqual(0, self.logouts(busy))
+        self.assertRaises(vmpie_exceptions.NotConnectedException, self.pool.checkout)
+
+        self.pool.checkin(busy)
+        self.assertEqual(1, self.logouts(busy))
+
+    def test_close_all_logs_out_checked_out_sessions(self):
+        busy = self.pool.checkout()
+        self.pool.close_all()
+        self.pool.checkin(busy)
+
+        self.assertEqual(1, self.logouts(busy))
+        self.assertEqual(0, self.pool._opened)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import task
+
+
+class TaskTest(unittest.TestCase):
+    def test_properties_are_served_from_a_snapshot(self):
+        pyVmomiTask = mock.Mock(_moId="task-1")
+        pyVmomiTask.info = mock.Mock(state=vim.TaskInfo.State.running, progress=40)
+        vmpie_task = task.Task(pyVmomiTask)
+
+        self.assertEqual(40, vmpie_task.progress)
+        self.assertTrue(vmpie_task.is_alive)
+
+        pyVmomiTask.info = mock.Mock(state=vim.TaskInfo.State.success, progress=None)
+        self.assertEqual(40, vmpie_task.progress)
+
+        vmpie_task.refresh()
+        self.assertEqual(100, vmpie_task.progress)
+        self.assertFalse(vmpie_task.is_alive)
+
+    @mock.patch.object(task.collector, "retrieve_objects_properties")
+    def test_load_in_a_single_call(self, retrieve_objects_properties):
+        vcenter = mock.Mock()
+        loaded = task.Task(vim.Task("task-2"))
+        info = mock.Mock(state=vim.TaskInfo.State.error)
+        retrieve_objects_properties.return_value = {"task-1": {"info": info}}
+
+        tasks = task.Task.load([vim.Task("task-1"), loaded], vcenter=vcenter)
+
+        self.assertIs(info, tasks[0].info)
+        self.assertIs(loaded, tasks[1])
+        self.assertIsNone(loaded._info)
+        self.assertEqual(1, retrieve_objects_properties.call_count)
+        self.assertEqual(["task-1", "task-2"],
+                         [obj._moId for obj in retrieve_objects_properties.call_args[0][0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import Queue
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import task_feed
+from tests import helpers
+
+
+class ScriptedCollector(object):
+    """
+    A property collector whose WaitForUpdatesEx returns scripted update sets, or raises scripted errors.
+    """
+    def __init__(self):
+        self.initial_updates = []
+        self.updates = Queue.Queue()
+        self.versions = []
+        self.destroyed = False
+
+    def CreateFilter(self, spec, partialUpdates):
+        return mock.Mock()
+
+    def WaitForUpdatesEx(self, version, options):
+        self.versions.append(version)
+        if options.maxWaitSeconds == 0:
+            return self.initial_updates.pop(0) if self.initial_updates else None
+
+        update = self.updates.get(timeout=5)
+        if isinstance(update, Exception):
+            raise update
+        return update
+
+    def DestroyPropertyCollector(self):
+        self.destroyed = True
+        self.updates.put(RuntimeError("The collector was destroyed."))
+
+
+def task_update(version, moid, state, progress=None, truncated=False):
+    change = mock.Mock(val=mock.Mock(state=state, progress=progress))
+    change.name = "info"
+    object_update = mock.Mock(obj=vim.Task(moid), kind="modify", changeSet=[change])
+    return mock.Mock(version=version, truncated=truncated, filterSet=[mock.Mock(objectSet=[object_update])])
+
+
+class TaskFeedTest(unittest.TestCase):
+    def setUp(self):
+        self.collectors = []
+        vcenter = helpers.fake_vcenter()
+        vcenter._connection.content.propertyCollector.CreatePropertyCollector.side_effect = self.create_collector
+        vcenter._connection.content.taskManager = vim.TaskManager("TaskManager")
+        self.feed = task_feed.TaskFeed(vcenter)
+        self.addCleanup(self.feed.stop)
+        self.initial_updates = []
+
+    def create_collector(self):
+        self.collectors.append(ScriptedCollector())
+        self.collectors[-1].initial_updates = self.initial_updates
+        return self.collectors[-1]
+
+    def test_subscriptions_share_a_collector(self):
+        errors = self.feed.subscribe(kinds=[task_feed.ERROR])
+        everything = self.feed.subscribe()
+        self.assertEqual(1, len(self.collectors))
+
+        self.collectors[0].updates.put(task_update("1", "task-1", vim.TaskInfo.State.running, 10))
+        self.collectors[0].updates.put(task_update("2", "task-1", vim.TaskInfo.State.error))
+
+        self.assertEqual(task_feed.RUNNING, everything.get(timeout=5).kind)
+        self.assertEqual(task_feed.ERROR, everything.get(timeout=5).kind)
+        self.assertEqual(task_feed.ERROR, errors.get(timeout=5).kind)
+
+    def test_truncated_initial_updates_are_not_events(self):
+        self.initial_updates.extend([
+            task_update("1", "task-1", vim.TaskInfo.State.running, 10, truncated=True),
+            task_update("2", "task-2", vim.TaskInfo.State.running, 10),
+        ])
+        subscription = self.feed.subscribe()
+
+        # task-2 arrived after the truncation, so its state is already known
+        self.collectors[0].updates.put(task_update("3", "task-2", vim.TaskInfo.State.running, 20))
+
+        self.assertEqual(task_feed.PROGRESS, subscription.get(timeout=5).kind)
+        self.assertEqual(["", "1", "2"], self.collectors[0].versions[:3])
+
+    def test_last_unsubscribe_stops_the_feed(self):
+        subscription = self.feed.subscribe()
+        subscription.close()
+
+        self.assertFalse(self.feed.is_alive())
+        self.assertTrue(self.collectors[0].destroyed)
+
+    def test_stale_listener_does_not_stop_the_restarted_feed(self):
+        self.feed.subscribe().close()
+        old_listener = self.feed._listener_thread
+        subscription = self.feed.subscribe()
+
+        old_listener.join(5)
+
+        self.assertTrue(self.feed.is_alive())
+        self.assertFalse(self.collectors[1].destroyed)
+        self.collectors[1].updates.put(task_update("1", "task-1", vim.TaskInfo.State.success))
+        self.assertEqual(task_feed.SUCCESS, subscription.get(timeout=5).kind)
+
+    def test_listener_error_closes_subscriptions(self):
+        subscription = self.feed.subscribe()
+        self.collectors[0].updates.put(RuntimeError("session expired"))
+
+        self.assertIsNone(subscription.get(timeout=5))
+        self.assertTrue(subscription.closed)
+        self.assertFalse(self.feed.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
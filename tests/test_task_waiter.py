@@ -0,0 +1,106 @@
+import threading
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import task_waiter
+from vmpie import vmpie_exceptions
+from tests import helpers
+
+
+def change(name, value):
+    change = mock.Mock(val=value)
+    change.name = name
+    return change
+
+
+def update_set(version, property_filter, *updates):
+    """
+    Build a WaitForUpdatesEx result of task changes, given (task, {property: value}) tuples.
+    """
+    object_updates = [mock.Mock(obj=task, changeSet=[change(name, value) for name, value in changes.iteritems()])
+                      for task, changes in updates]
+    return mock.Mock(version=version, filterSet=[mock.Mock(filter=property_filter, objectSet=object_updates)])
+
+
+class TaskWaiterTest(unittest.TestCase):
+    def setUp(self):
+        self.vcenter = helpers.fake_vcenter()
+        self.property_collector = self.vcenter._connection.content.propertyCollector.CreatePropertyCollector.return_value
+        self.property_filter = self.property_collector.CreateFilter.return_value
+        self.waiter = task_waiter.TaskWaiter(self.vcenter)
+
+    def test_poll_completes_tasks(self):
+        tasks = [vim.Task("task-1"), vim.Task("task-2")]
+        self.waiter.add(tasks)
+        self.assertEqual(1, self.property_collector.CreateFilter.call_count)
+
+        self.property_collector.WaitForUpdatesEx.return_value = update_set(
+            "1", self.property_filter, (tasks[0], {"info.state": vim.TaskInfo.State.success, "info.result": 7}))
+        completed = self.waiter.poll()
+
+        self.assertEqual(["task-1"], [result.task._moId for result in completed])
+        self.assertEqual(7, completed[0].result)
+        self.assertFalse(self.property_filter.Destroy.called)
+
+        self.property_collector.WaitForUpdatesEx.return_value = update_set(
+            "2", self.property_filter, (tasks[1], {"info.state": vim.TaskInfo.State.error}))
+        self.waiter.poll()
+
+        self.property_filter.Destroy.assert_called_once_with()
+        self.assertEqual(set(["task-1", "task-2"]), set(self.waiter.wait()))
+
+    def test_callback_of_completed_task(self):
+        task = vim.Task("task-1")
+        self.waiter.add([task])
+        self.property_collector.WaitForUpdatesEx.return_value = update_set(
+            "1", self.property_filter, (task, {"info.state": vim.TaskInfo.State.success}))
+        self.waiter.poll()
+
+        callback = mock.Mock()
+        self.waiter.add([task], callback)
+
+        callback.assert_called_once_with(self.waiter._results["task-1"])
+        self.assertEqual(1, self.property_collector.CreateFilter.call_count)
+
+    def test_single_property_collector(self):
+        create = self.vcenter._connection.content.propertyCollector.CreatePropertyCollector
+        threads = [threading.Thread(target=self.waiter._get_property_collector) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, create.call_count)
+
+    def test_close_destroys_property_collector(self):
+        self.waiter.add([vim.Task("task-1")])
+        self.waiter.close()
+
+        self.property_collector.DestroyPropertyCollector.assert_called_once_with()
+        self.assertFalse(self.waiter.is_alive())
+
+    def test_listener_death_fails_pending_futures(self):
+        self.property_collector.WaitForUpdatesEx.side_effect = RuntimeError("session expired")
+        future = self.waiter.add_future(vim.Task("task-1"))
+        self.waiter.start()
+        self.waiter._listener_thread.join(1)
+
+        self.assertFalse(self.waiter.is_alive())
+        self.assertIsInstance(future.exception(timeout=1), vmpie_exceptions.TaskWaiterStoppedException)
+        self.assertIn("session expired", str(future.exception()))
+        self.property_collector.DestroyPropertyCollector.assert_called_once_with()
+
+    def test_close_fails_pending_callbacks(self):
+        callback = mock.Mock()
+        self.waiter.add([vim.Task("task-1")], callback)
+        self.waiter.close()
+
+        result, = callback.call_args[0]
+        self.assertIsInstance(result.error, vmpie_exceptions.TaskWaiterStoppedException)
+        self.assertFalse(result.is_success)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import utils
+from vmpie import vmpie_exceptions
+from tests import helpers
+
+
+class GetObjectsByNamesTest(unittest.TestCase):
+    def setUp(self):
+        self.vms = [vim.VirtualMachine("vm-1"), vim.VirtualMachine("vm-2"), vim.VirtualMachine("vm-3")]
+        patcher = mock.patch.object(utils.collector, "retrieve_container_properties", return_value=[
+            (self.vms[0], {"name": "a"}), (self.vms[1], {"name": "b"}), (self.vms[2], {"name": "a"})
+        ])
+        self.retrieve_container_properties = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.vcenter = mock.Mock()
+
+    def test_found_and_missing(self):
+        found, missing = utils.get_objects_by_names(["a", "c", "b", "c"], [vim.VirtualMachine], vcenter=self.vcenter)
+
+        self.assertEqual({"a": self.vms[0], "b": self.vms[1]}, found)
+        self.assertEqual(["c"], missing)
+        self.retrieve_container_properties.assert_called_once_with([vim.VirtualMachine], ["name"], container=None,
+                                                                   vcenter=self.vcenter)
+
+    def test_defaults_to_all_inventory_objects(self):
+        utils.get_objects_by_names(["a"], vcenter=self.vcenter)
+
+        vimtypes = self.retrieve_container_properties.call_args[0][0]
+        self.assertEqual([vim.ManagedEntity], vimtypes)
+
+
+class GetObjByNameTest(unittest.TestCase):
+    def setUp(self):
+        self.vcenter = mock.Mock()
+        self.index = self.vcenter.name_index
+        self.index.covers.return_value = True
+
+    @mock.patch.object(utils.collector, "retrieve_container_properties")
+    def test_answered_by_the_index(self, retrieve_container_properties):
+        vm = vim.VirtualMachine("vm-1")
+        self.index.lookup.return_value = vm
+
+        self.assertIs(vm, utils.get_obj_by_name("a", [vim.VirtualMachine], vcenter=self.vcenter))
+        self.assertFalse(retrieve_container_properties.called)
+
+    @mock.patch.object(utils.collector, "retrieve_container_properties")
+    def test_created_object_missing_from_the_index(self, retrieve_container_properties):
+        vm = vim.VirtualMachine("vm-1")
+        # The index hasn't received the creation of the vm yet
+        self.index.lookup.return_value = None
+        retrieve_container_properties.return_value = [(vm, {"name": "a"})]
+
+        self.assertIs(vm, utils.get_obj_by_name("a", [vim.VirtualMachine], vcenter=self.vcenter))
+
+    @mock.patch.object(utils.collector, "retrieve_container_properties", return_value=[])
+    def test_missing(self, retrieve_container_properties):
+        self.index.lookup.return_value = None
+
+        self.assertRaises(vmpie_exceptions.ObjectNotFoundException, utils.get_obj_by_name, "a",
+                          [vim.VirtualMachine], vcenter=self.vcenter)
+
+
+class FindVmTest(unittest.TestCase):
+    def setUp(self):
+        self.vcenter = helpers.fake_vcenter()
+        self.search_index = self.vcenter._connection.content.searchIndex
+        self.vm = vim.VirtualMachine("vm-1")
+
+    def test_by_instance_uuid(self):
+        self.search_index.FindByUuid.return_value = self.vm
+
+        self.assertIs(self.vm, utils.find_vm(uuid="4210", instance_uuid=True, vcenter=self.vcenter))
+        self.search_index.FindByUuid.assert_called_once_with(datacenter=None, uuid="4210", vmSearch=True,
+                                                             instanceUuid=True)
+
+    def test_by_ip_and_dns_name(self):
+        self.search_index.FindByIp.return_value = self.vm
+        self.search_index.FindByDnsName.return_value = self.vm
+
+        self.assertIs(self.vm, utils.find_vm(ip="10.0.0.1", vcenter=self.vcenter))
+        self.assertIs(self.vm, utils.find_vm(dns_name="vm.local", vcenter=self.vcenter))
+        self.search_index.FindByIp.assert_called_once_with(datacenter=None, ip="10.0.0.1", vmSearch=True)
+        self.search_index.FindByDnsName.assert_called_once_with(datacenter=None, dnsName="vm.local", vmSearch=True)
+
+    def test_path_of_another_entity_is_not_found(self):
+        self.search_index.FindByInventoryPath.return_value = vim.Folder("group-v1")
+
+        self.assertRaises(vmpie_exceptions.ObjectNotFoundException, utils.find_vm, inventory_path="dc/vm/folder",
+                          vcenter=self.vcenter)
+
+    def test_missing(self):
+        self.search_index.FindByUuid.return_value = None
+
+        self.assertRaises(vmpie_exceptions.ObjectNotFoundException, utils.find_vm, uuid="4210", vcenter=self.vcenter)
+
+    def test_requires_a_criteria(self):
+        self.assertRaises(ValueError, utils.find_vm, vcenter=self.vcenter)
+        self.assertFalse(self.search_index.method_calls)
+
+
+class CreateFolderTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.vcenter = helpers.fake_vcenter()
+        root = self.vcenter._connection.content.rootFolder
+        datacenters = [vim.Datacenter("datacenter-1"), vim.Datacenter("datacenter-2")]
+        vm_folders = [vim.Folder("group-v1"), vim.Folder("group-v2")]
+        sub_folder = vim.Folder("group-v3")
+
+        contents = [
+            helpers.object_content(root, name="Datacenters", childEntity=vim.ManagedEntity.Array(datacenters)),
+            helpers.object_content(datacenters[0], name="dc1", vmFolder=vm_folders[0]),
+            helpers.object_content(datacenters[1], name="dc2", vmFolder=vm_folders[1]),
+            helpers.object_content(vm_folders[0], name="vm",
+                                   childEntity=vim.ManagedEntity.Array([sub_folder, vim.VirtualMachine("vm-1")])),
+            helpers.object_content(vm_folders[1], name="vm", childEntity=vim.ManagedEntity.Array()),
+            helpers.object_content(sub_folder, name="web", childEntity=vim.ManagedEntity.Array()),
+        ]
+        property_collector = self.vcenter._connection.content.propertyCollector
+        property_collector.RetrievePropertiesEx.return_value = helpers.retrieve_result(contents)
+
+        patcher = mock.patch.object(utils, "get_vcenter", return_value=self.vcenter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_includes_every_datacenter_in_one_call(self):
+        tree = utils._create_folder_tree()
+
+        self.assertEqual({"Datacenters": {"dc1": {"vm": {"web": {}}}, "dc2": {"vm": {}}}}, tree)
+        self.assertEqual(1, self.vcenter._connection.content.propertyCollector.RetrievePropertiesEx.call_count)
+
+
+class IterObjectsTest(unittest.TestCase):
+    @mock.patch.object(utils.collector, "iter_container_properties")
+    def test_pages(self, iter_container_properties):
+        vms = [vim.VirtualMachine("vm-1"), vim.VirtualMachine("vm-2")]
+        iter_container_properties.return_value = iter([[(vms[0], {})], [(vms[1], {})]])
+
+        self.assertEqual(vms, list(utils.iter_objects([vim.VirtualMachine], page_size=1)))
+        iter_container_properties.assert_called_once_with([vim.VirtualMachine], [], page_size=1)
+
+    @mock.patch.object(utils.collector, "iter_container_properties", return_value=iter([]))
+    def test_defaults_to_all_inventory_objects(self, iter_container_properties):
+        list(utils.iter_objects())
+        self.assertEqual([vim.ManagedEntity], iter_container_properties.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+import mock
+from pyVmomi import vim
+
+from vmpie import plugin
+from vmpie import vcenter
+
+
+class TaskWaiterPropertyTest(unittest.TestCase):
+    @mock.patch.object(vcenter.task_waiter, "TaskWaiter")
+    def test_dead_waiter_is_closed_and_replaced(self, task_waiter_class):
+        dead_waiter, new_waiter = mock.Mock(), mock.Mock()
+        dead_waiter.is_alive.return_value = False
+        task_waiter_class.return_value = new_waiter
+
+        vc = vcenter.VCenter()
+        vc._task_waiter = dead_waiter
+
+        self.assertIs(new_waiter, vc.task_waiter)
+        dead_waiter.close.assert_called_once_with()
+        new_waiter.start.assert_called_once_with()
+
+
+class NameIndexPropertyTest(unittest.TestCase):
+    @mock.patch.object(vcenter.name_index, "NameIndex")
+    def test_dead_index_is_stopped_and_replaced(self, name_index_class):
+        dead_index, new_index = mock.Mock(), mock.Mock()
+        dead_index.is_alive.return_value = False
+        name_index_class.return_value = new_index
+
+        vc = vcenter.VCenter()
+        vc._name_index = dead_index
+
+        self.assertIs(new_index, vc.name_index)
+        dead_index.stop.assert_called_once_with()
+        new_index.start.assert_called_once_with()
+
+
+class InvalidateParentsTest(unittest.TestCase):
+    @mock.patch.object(vcenter.parent_cache, "ParentCache")
+    def test_does_not_build_the_cache(self, parent_cache_class):
+        vc = vcenter.VCenter()
+        vc.invalidate_parents(mock.Mock(), mock.Mock())
+
+        self.assertFalse(parent_cache_class.called)
+        self.assertIsNone(vc._task_waiter)
+
+    def test_invalidates_a_built_cache(self):
+        vc = vcenter.VCenter()
+        vc._parent_cache = mock.Mock()
+        task, obj = mock.Mock(), mock.Mock()
+        vc.invalidate_parents(task, obj)
+
+        vc._parent_cache.invalidate_after.assert_called_once_with(task, obj)
+
+
+class LoginTest(unittest.TestCase):
+    @mock.patch.object(vcenter, "SmartConnect")
+    def test_unverified_retry_uses_its_own_context(self, smart_connect):
+        connection = mock.Mock()
+        smart_connect.side_effect = [vcenter.ssl.SSLError("[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed"),
+                                     connection]
+        default_context = vcenter.ssl._create_default_https_context
+
+        self.assertIs(connection, vcenter.VCenter()._login("vc", "user", "passwd"))
+
+        self.assertIs(default_context, vcenter.ssl._create_default_https_context)
+        self.assertNotIn("sslContext", smart_connect.call_args_list[0][1])
+        self.assertIsInstance(smart_connect.call_args[1]["sslContext"], vcenter.ssl.SSLContext)
+
+
+class QueryVmsTest(unittest.TestCase):
+    def setUp(self):
+        self.vc = vcenter.VCenter()
+        self.vms = [vim.VirtualMachine("vm-{0}".format(index)) for index in range(3)]
+        rows = [
+            {"name": "web-1", "config.template": False, "summary.config.guestId": "ubuntu64Guest",
+             "runtime.powerState": "poweredOn"},
+            {"name": "web-2", "config.template": False, "summary.config.guestId": "winXPProGuest",
+             "runtime.powerState": "poweredOn"},
+            {"name": "db-1", "config.template": True, "summary.config.guestId": "ubuntu64Guest",
+             "runtime.powerState": "poweredOff"},
+        ]
+
+        patcher = mock.patch.object(vcenter.collector, "iter_container_properties",
+                                    return_value=iter([zip(self.vms, rows)]))
+        self.iter_container_properties = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def names(self, vms):
+        return [vm.name for vm in vms]
+
+    def test_filters_are_combined(self):
+        vms = self.vc.query_vms(power_state="poweredOn", guest_family=plugin.UNIX, template=False,
+                                name_regex="^web")
+
+        self.assertEqual(["web-1"], self.names(vms))
+        self.assertIs(self.vc, vms[0].vcenter)
+
+    def test_only_required_properties_are_retrieved(self):
+        self.vc.query_vms(power_state="poweredOff", properties=["runtime.host", "name"])
+
+        path_set = self.iter_container_properties.call_args[0][1]
+        self.assertEqual(vcenter.consts.VM_INVENTORY_PROPERTIES + ["runtime.powerState", "runtime.host"], path_set)
+
+
+class ConnectTest(unittest.TestCase):
+    @mock.patch.object(vcenter, "atexit")
+    @mock.patch.object(vcenter, "vmpie")
+    @mock.patch.object(vcenter.VCenter, "session_keeper")
+    @mock.patch.object(vcenter.VCenter, "_login")
+    def test_reconnect_closes_the_previous_pool(self, login, session_keeper, vmpie, atexit):
+        vc = vcenter.VCenter()
+        vc.connect("vc", "user", "passwd")
+        previous_pool = vc._session_pool = mock.Mock()
+        vc._connection = None
+
+        vc.connect("vc", "user", "passwd")
+
+        previous_pool.close.assert_called_once_with()
+        atexit.register.assert_any_call(vc._session_pool.close_all)
+
+
+if __name__ == "__main__":
+    unittest.main()
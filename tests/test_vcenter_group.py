@@ -0,0 +1,32 @@
+import unittest
+
+import mock
+
+from vmpie import vcenter_group
+
+
+class VCenterGroupTest(unittest.TestCase):
+    def test_vcenters_of_the_same_host_are_kept_apart(self):
+        first, second = mock.Mock(_host="vc"), mock.Mock(_host="vc")
+        first.get_all_vms.return_value = ["vm-1"]
+        second.get_all_vms.return_value = ["vm-2"]
+
+        group = vcenter_group.VCenterGroup()
+        group.vcenters = [first, second]
+
+        self.assertEqual({first: ["vm-1"], second: ["vm-2"]}, group.map(lambda vc: vc.get_all_vms()))
+        self.assertEqual(["vm-1", "vm-2"], group.get_all_vms())
+
+    def test_get_vms_prefers_the_first_vcenter(self):
+        first, second = mock.Mock(_host="vc-1"), mock.Mock(_host="vc-2")
+        first.get_vms.return_value = ({"a": "vm-1"}, ["b"])
+        second.get_vms.return_value = ({"a": "vm-2"}, ["b"])
+
+        group = vcenter_group.VCenterGroup()
+        group.vcenters = [first, second]
+
+        self.assertEqual(({"a": "vm-1"}, ["b"]), group.get_vms(["a", "b"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
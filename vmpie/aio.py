@@ -0,0 +1,164 @@
+# ==================================================================================================================== #
+# File Name     : aio.py
+# Purpose       : Provide an asyncio facade for vmpie objects.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import asyncio
+except ImportError:
+    # Python 2 (pip install vmpie[aio])
+    import trollius as asyncio
+
+import consts
+import decorators
+import folder
+import plugin
+import datastore
+import vcenter
+import virtual_machine
+
+# ==================================================== CONSTANTS ===================================================== #
+
+_WRAPPED_TYPES = (vcenter.VCenter, virtual_machine.VirtualMachine, folder.Folder, datastore.Datastore, plugin.Plugin)
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class _AsyncProxy(object):
+    """
+    Wrap a vmpie object so its methods and properties return awaitable futures instead of blocking.
+    The blocking calls run on the executor, and returned vmpie objects are wrapped as well, ie:
+        vm = (yield From(vcenter.get_vms(["vm"])))[0]["vm"]
+        yield From(vm.hardware.power_on())
+    """
+    def __init__(self, target, loop, executor):
+        self._target = target
+        self._loop = loop
+        self._executor = executor
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        # Properties may issue requests, so they're resolved on the executor as well
+        if isinstance(getattr(type(self._target), name, None), property):
+            return self.run(getattr, self._target, name)
+
+        value = getattr(self._target, name)
+
+        if isinstance(value, _WRAPPED_TYPES):
+            return self._wrap(value)
+
+        if callable(value):
+            @functools.wraps(value)
+            def method(*args, **kwargs):
+                return self.run(value, *args, **kwargs)
+            return method
+
+        return value
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run a blocking function on the executor.
+        @return: A future of the wrapped result of the function.
+        @rtype: I{asyncio.Future}
+        """
+        future = self._loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        result = asyncio.Future(loop=self._loop)
+
+        def done(completed):
+            if result.cancelled():
+                return
+            if completed.cancelled():
+                result.cancel()
+            elif completed.exception() is not None:
+                result.set_exception(completed.exception())
+            else:
+                result.set_result(self._wrap(completed.result()))
+
+        future.add_done_callback(done)
+        return result
+
+    def wait_for_task(self, task):
+        """
+        Wait for a vCenter task to complete without blocking the event loop.
+        @param task: The task.
+        @type task: I{vim.Task / vmpie.task.Task}
+        @return: A future of the result of the task.
+        @rtype: I{asyncio.Future}
+        """
+        result = asyncio.Future(loop=self._loop)
+
+        def set_result(task_result):
+            if result.cancelled():
+                return
+            if task_result.error is not None:
+                result.set_exception(task_result.error)
+            else:
+                result.set_result(self._wrap(task_result.result))
+
+        # The task is tracked by the vCenter's shared waiter, so no executor thread is held while waiting
+        self._get_vcenter().task_waiter.add([task], lambda task_result: self._loop.call_soon_threadsafe(
+            set_result, task_result))
+        return result
+
+    def _get_vcenter(self):
+        if isinstance(self._target, vcenter.VCenter):
+            return self._target
+        # The vCenter of the object, or of the vm of a plugin
+        return decorators._get_vcenter(self._target)
+
+    def _wrap(self, value):
+        if isinstance(value, _AsyncProxy):
+            return value
+        if isinstance(value, _WRAPPED_TYPES):
+            return _AsyncProxy(value, self._loop, self._executor)
+        if isinstance(value, dict):
+            return dict((key, self._wrap(item)) for key, item in value.iteritems())
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._wrap(item) for item in value)
+        return value
+
+    def __str__(self):
+        return '<Async {target}>'.format(target=self._target)
+
+    def __repr__(self):
+        return '<Async {target}>'.format(target=self._target)
+
+
+class AsyncVCenter(_AsyncProxy):
+    """
+    An asyncio facade for a vCenter.
+    Blocking calls run on an executor with a worker per pooled session (See VCenter.session), so concurrent
+    operations don't wait for each other's sessions.
+    Usage::
+        @trollius.coroutine
+        def power_on_all():
+            avc = AsyncVCenter(vmpie.vcenter)
+            vms = yield From(avc.get_all_vms())
+            yield From(vms[0].hardware.power_on())
+    """
+    def __init__(self, vc, loop=None, max_workers=None):
+        """
+        @param vc: A connected vCenter.
+        @type vc: I{vmpie.vcenter.VCenter}
+        @param loop: The event loop. Defaults to the current event loop.
+        @type loop: I{asyncio.AbstractEventLoop}
+        @param max_workers: The number of executor threads. Defaults to the size of the session pool.
+        @type max_workers: I{int}
+        """
+        pool_size = vc._session_pool._size if vc._session_pool else consts.SESSION_POOL_SIZE
+        executor = ThreadPoolExecutor(max_workers=max_workers or pool_size)
+        super(AsyncVCenter, self).__init__(vc, loop or asyncio.get_event_loop(), executor)
+
+    def close(self):
+        """
+        Shut down the executor.
+        """
+        self._executor.shutdown(wait=False)
@@ -171,7 +171,7 @@ class FilesystemPlugin(plugin.Plugin):
 
             try:
                 file_attribute = vim.vm.guest.FileManager.FileAttributes()
-                vcenter = utils.get_vcenter()
+                vcenter = self.vm.vcenter
 
                 url = vcenter._connection.content.guestOperationsManager.fileManager. \
                     InitiateFileTransportToGuest(self.vm._pyVmomiVM,
@@ -210,7 +210,7 @@ class FilesystemPlugin(plugin.Plugin):
                 password=self.vm.password)
 
             try:
-                vcenter = utils.get_vcenter()
+                vcenter = self.vm.vcenter
 
                 file_info = vcenter._connection.content.guestOperationsManager.fileManager. \
                     InitiateFileTransferFromGuest(self.vm._pyVmomiVM,
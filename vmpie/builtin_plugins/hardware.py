@@ -3,6 +3,7 @@ import logging
 import vmpie.plugin as plugin
 import vmpie.utils as utils
 from pyVmomi import vim
+from vmpie.task import Task
 from vmpie.decorators import connected
 
 
@@ -15,22 +16,24 @@ class HardwarePlugin(plugin.Plugin):
     _os = [plugin.UNIX, plugin.WINDOWS]
 
     @connected
-    def power_on(self):
+    def power_on(self, future=False):
         """
-        Power on the vm and wait for the task to complete.
-        :return: None
+        Power on the vm (doesn't wait for the task to complete)
+        :param future: {bool} Whether to return a future of the task's result instead of the task
+        :return: {vmpie.task.Task / concurrent.futures.Future} The power on task
         """
         logging.info('Powering on vm {vm}'.format(vm=self.vm.name))
-        self.vm.pyVmomiVM.PowerOnVM_Task()
+        return self._task_or_future(self._start_task("PowerOnVM_Task"), future)
 
     @connected
-    def power_off(self):
+    def power_off(self, future=False):
         """
-        Power off the vm and wait for the task to complete.
-        :return: None
+        Power off the vm (doesn't wait for the task to complete)
+        :param future: {bool} Whether to return a future of the task's result instead of the task
+        :return: {vmpie.task.Task / concurrent.futures.Future} The power off task
         """
         logging.info('Powering off vm {vm}'.format(vm=self.vm.name))
-        self.vm.pyVmomiVM.PowerOffVM_Task()
+        return self._task_or_future(self._start_task("PowerOffVM_Task"), future)
 
     @connected
     def shutdown(self):
@@ -39,7 +42,8 @@ class HardwarePlugin(plugin.Plugin):
         :return: None
         """
         logging.info('Shutdown vm {vm}'.format(vm=self.vm.name))
-        self.vm.pyVmomiVM.ShutdownGuest()
+        with self.vm.vcenter.session() as session:
+            session.bind(self.vm._pyVmomiVM).ShutdownGuest()
 
     @connected
     def reboot(self):
@@ -48,30 +52,36 @@ class HardwarePlugin(plugin.Plugin):
         :return: None
         """
         logging.info('Restarting guest in vm {vm}'.format(vm=self.vm.name))
-        self.vm.pyVmomiVM.RebootGuest()
+        with self.vm.vcenter.session() as session:
+            session.bind(self.vm._pyVmomiVM).RebootGuest()
 
     @connected
-    def hard_reboot(self):
+    def hard_reboot(self, future=False):
         """
         Perform a hard reboot of a vm's guest (doesn't wait for the task to complete)
-        :return: None
+        :param future: {bool} Whether to return a future of the task's result instead of the task
+        :return: {vmpie.task.Task / concurrent.futures.Future} The reset task
         """
         logging.info('Restarting vm {vm}'.format(vm=self.vm.name))
-        self.vm.pyVmomiVM.ResetVM_Task()
+        return self._task_or_future(self._start_task("ResetVM_Task"), future)
 
     @connected
-    def rename(self, new_vm_name):
+    def rename(self, new_vm_name, future=False):
         """
-        Rename a vm and wait for task to complete
+        Rename a vm (doesn't wait for the task to complete)
         :param new_vm_name: {str} The new vm's name
-        :return: None
+        :param future: {bool} Whether to return a future of the task's result instead of the task
+        :return: {vmpie.task.Task / concurrent.futures.Future} The rename task
         """
         logging.info('Renaming vm {vm} to {new_name}'.format(vm=self.vm.name, new_name=new_vm_name))
-        self.vm.pyVmomiVM.Rename_Task(new_vm_name)
+        rename_task = self._start_task("Rename_Task", new_vm_name)
+        self.vm.vcenter.invalidate_parents(rename_task, self.vm._pyVmomiVM)
+        return self._task_or_future(rename_task, future)
 
     @connected
     def clone(self, vm_name, dst_folder, resource_pool_name=None,
-              datastore_name=None, power_on=False, as_template=False):
+              datastore_name=None, power_on=False, as_template=False, wait=True,
+              future=False):
         """
         Clone a vm to a folder and wait for the task to complete.
         :param vm_name: {str} The name of the cloned vm
@@ -80,19 +90,22 @@ class HardwarePlugin(plugin.Plugin):
         :param datastore_name: {str} The name of the cloned vm's datastore
         :param power_on: {bool} Whether to power on the cloned vm after creation
         :param as_template: {bool} Whether to clone the vm to a template
-        :return: None
+        :param wait: {bool} Whether to wait for the clone to complete
+        :param future: {bool} Whether to return a future of the cloned vm instead of waiting for the clone
+        :return: {vmpie.task.Task / concurrent.futures.Future} The clone task
         """
         if resource_pool_name:
             # Get resource pool by name
             resource_pool = utils.get_obj_by_name(resource_pool_name,
-                                                  [vim.ResourcePool])
+                                                  [vim.ResourcePool],
+                                                  vcenter=self.vm.vcenter)
         else:
             # Get the current vm's resource pool
             resource_pool = self.vm._pyVmomiVM.resourcePool
 
         if datastore_name:
             # Get datastore by name
-            datastore = utils.get_obj_by_name(datastore_name, [vim.Datastore])
+            datastore = utils.get_obj_by_name(datastore_name, [vim.Datastore], vcenter=self.vm.vcenter)
         else:
             # Get the first available datastore
             datastore = self.vm._pyVmomiVM.datastore[0]
@@ -106,18 +119,47 @@ class HardwarePlugin(plugin.Plugin):
                                      location=relocate_spec)
 
         # Get destination folder
-        dst_folder = utils.get_obj_by_name(dst_folder, [vim.Folder])
+        dst_folder = utils.get_obj_by_name(dst_folder, [vim.Folder], vcenter=self.vm.vcenter)
 
         logging.info('Cloning vm {vm} to {dst_folder}'.format(
             vm=self.vm.name,
             dst_folder=dst_folder.name))
 
         # Initiate clone
-        clone_task = self.vm._pyVmomiVM.Clone(name=vm_name, folder=dst_folder,
-                                  spec=cloneSpec)
+        clone_task = self._start_task("Clone", name=vm_name, folder=dst_folder, spec=cloneSpec)
+
+        if future:
+            return self._task_or_future(clone_task, future)
+
+        if wait:
+            # Wait for clone to complete
+            utils.wait_for_task(clone_task, vcenter=self.vm.vcenter)
 
-        # Wait for clone to complete
-        utils.wait_for_task(clone_task)
+        return clone_task
+
+    def _start_task(self, method_name, *args, **kwargs):
+        """
+        Call a task method of the vm through a pooled session
+        :param method_name: {str} The name of the pyVmomi method
+        :return: {vmpie.task.Task} The started task, bound to the main connection of the vCenter
+        """
+        vcenter = self.vm.vcenter
+        with vcenter.session() as session:
+            started_task = getattr(session.bind(self.vm._pyVmomiVM), method_name)(*args, **kwargs)
+
+        # The pooled session may be closed while the task is running
+        return Task(vim.Task(started_task._moId, stub=vcenter._connection._stub))
+
+    def _task_or_future(self, started_task, future):
+        """
+        :param started_task: {vmpie.task.Task} A started task
+        :param future: {bool} Whether to return a future of the task's result
+        :return: {vmpie.task.Task / concurrent.futures.Future} The task, or a future resolved by the vCenter's
+                 shared task waiter
+        """
+        if future:
+            return self.vm.vcenter.task_waiter.add_future(started_task)
+        return started_task
 
     @connected
     def link_clone(self):
@@ -7,11 +7,15 @@
 # ===================================================== IMPORTS ====================================================== #
 
 import sys
+import time
 import uuid
 import types
 import inspect
 import pickle
-from collections import Mapping
+import logging
+import weakref
+from threading import Thread, Lock
+from collections import Mapping, deque
 
 import Pyro4
 import vmpie.consts as consts
@@ -29,6 +33,27 @@ REF_LABEL = 3
 FILE_LABEL = 4
 MAPPING_LABEL = 5
 PICKLED_LABEL = 6
+# TODO: Don't hardcode the URI
+SERVER_URI = "PYRO:Vmpie.Server@10.0.0.135:2808"
+
+# Kinds of remote module attributes
+SUBMODULE_KIND = 1
+CALLABLE_KIND = 2
+VALUE_KIND = 3
+# Resolve the kind of an attribute, and its value if it's a regular attribute, in a single evaluation
+RESOLVE_ATTRIBUTE_EXPRESSION = "(lambda attr: ({submodule}, None) if inspect.ismodule(attr) else " \
+                               "({callable}, None) if callable(attr) else ({value}, attr))({{name}})".format(
+                                   submodule=SUBMODULE_KIND, callable=CALLABLE_KIND, value=VALUE_KIND)
+# List (name, kind, is constant, value) of all the attributes of a module in a single evaluation
+MODULE_MANIFEST_EXPRESSION = "(lambda module: [(name, {submodule} if inspect.ismodule(attr) else " \
+                             "{callable} if callable(attr) else {value}, isinstance(attr, {constants}), " \
+                             "attr if isinstance(attr, {constants}) else None) " \
+                             "for name, attr in vars(module).items()])({{name}})".format(
+                                 submodule=SUBMODULE_KIND, callable=CALLABLE_KIND, value=VALUE_KIND,
+                                 constants="(bool, int, long, float, str, unicode)")
+
+# Resolved attribute kinds by guest python build, shared by all the virtual machines running the same build
+_attribute_kinds_cache = {}
 
 _BUILTIN_TYPES = [
     type, object, bool, complex, dict, float, int, list, slice, str, tuple, set,
@@ -37,6 +62,8 @@ _BUILTIN_TYPES = [
     types.InstanceType, types.ClassType, types.DictProxyType
 ]
 
+_NORMALIZED_BUILTIN_TYPES = dict(((t.__name__, t.__module__), t) for t in _BUILTIN_TYPES)
+
 _LOCAL_OBJECT_ATTRS = frozenset([
     '_RemoteObject__oid', 'vm', '_RemoteObject__class_name', '_RemoteObject__module_name',
     '_RemoteObject__methods', '__class__', '__cmp__', '__del__', '__delattr__',
@@ -145,8 +172,11 @@ def unpack(vm, object):
             return data
 
         elif label == REF_LABEL or FILE_LABEL:
-            oid, class_name, module_name, methods = data
-            return _RemoteObject(oid=oid, vm=vm, class_name=class_name, module_name=module_name, methods=methods)
+            oid, type_id, epoch = data
+            class_name, module_name, methods = connection_pool.describe_type(vm, type_id, epoch)
+            remote_object = _RemoteObject(oid=oid, vm=vm, class_name=class_name, module_name=module_name,
+                                          methods=methods)
+            return connection_pool.track(vm, remote_object)
 
 
 def pack(obj):
@@ -212,48 +242,305 @@ def is_file(obj):
 # ===================================================== CLASSES ====================================================== #
 
 
+class _ConnectionPool(object):
+    """
+    Hold the Pyro connections to the virtual machines, one per virtual machine.
+    Connections are created on first use and shared by every object representing the same virtual machine,
+    keyed by the vCenter host and the managed object id of the virtual machine.
+    The pool also tracks the lifetime of remote objects, and releases them on the server in batches
+    once they are garbage collected. Releases are sent when a batch fills up, and by a background thread
+    every consts.REMOTE_RELEASE_FLUSH_INTERVAL seconds while remote objects are alive.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        # Connecting takes several round trips, so only connections to the same virtual machine wait for each other
+        self._connect_locks = {}
+        self._connections = {}
+        self._builds = {}
+        self._type_descriptions = {}
+        self._type_epochs = {}
+        # Weak references to the living remote objects, and (vm key, handle) of the collected ones
+        self._tracked = set()
+        self._released = deque()
+        # Handles of collected objects whose connection was closed, by vm key
+        self._orphaned = {}
+        self._flusher = None
+
+    def get(self, vm):
+        """
+        Get the connection to a virtual machine, connecting if needed.
+        @param vm: The target machine
+        @type vm: vmpie.virtual_machine.VirtualMachine
+        @return: Pyro4 proxy to the Pyro server on the target machine.
+        @rtype: Pyro4.Proxy
+        """
+        key = self._get_key(vm)
+        connection = self._connections.get(key)
+
+        if connection is None:
+            with self._lock:
+                connect_lock = self._connect_locks.setdefault(key, Lock())
+
+            with connect_lock:
+                connection = self._connections.get(key)
+                if connection is None:
+                    connection = self._connect()
+                    build = unpack(vm, connection.evaluate("sys.version"))
+                    with self._lock:
+                        self._builds[key] = build
+                        self._connections[key] = connection
+                        # The server may have restarted since the last connection
+                        self._type_descriptions.pop(key, None)
+                        self._type_epochs.pop(key, None)
+                        orphaned = self._orphaned.pop(key, [])
+                    self._released.extend((key, handle) for handle in orphaned)
+
+        if len(self._released) >= consts.REMOTE_RELEASE_BATCH_SIZE:
+            self.flush_releases()
+
+        return connection
+
+    def track(self, vm, remote_object):
+        """
+        Release the server's reference of a remote object once the object is garbage collected.
+        @param vm: The target machine
+        @type vm: vmpie.virtual_machine.VirtualMachine
+        @param remote_object: A remote object received from the server.
+        @type remote_object: _RemoteObject
+        @return: The remote object.
+        @rtype: _RemoteObject
+        """
+        key = self._get_key(vm)
+        handle = remote_object._RemoteObject__oid
+
+        def finalize(ref):
+            # Called by the garbage collector, so only queue the release.
+            # Queued before the reference is discarded, so the flusher never sees an idle pool in between.
+            self._released.append((key, handle))
+            self._tracked.discard(ref)
+
+        self._tracked.add(weakref.ref(remote_object, finalize))
+        self._start_flusher()
+        return remote_object
+
+    def flush_releases(self):
+        """
+        Send the releases of the garbage collected remote objects, a single call per virtual machine.
+        The server keeps the objects of a closed connection, so their releases are kept until the
+        virtual machine is connected again. They can also be removed right away with RemotePlugin.evict.
+        """
+        handles = {}
+        while True:
+            try:
+                # The flusher and the callers of get may flush at the same time
+                key, handle = self._released.popleft()
+            except IndexError:
+                break
+            handles.setdefault(key, []).append(handle)
+
+        for key, vm_handles in handles.iteritems():
+            with self._lock:
+                connection = self._connections.get(key)
+                if connection is None:
+                    self._orphaned.setdefault(key, []).extend(vm_handles)
+                    continue
+
+            try:
+                connection.release(vm_handles)
+            except Exception:
+                logging.debug("Failed releasing remote objects.", exc_info=True)
+
+    def describe_type(self, vm, type_id, epoch):
+        """
+        Get the class name, module name and methods of a type sent by the server of a virtual machine.
+        The description is fetched once per type per connection and server epoch.
+        @param vm: The target machine
+        @type vm: vmpie.virtual_machine.VirtualMachine
+        @param type_id: The type id sent by the server.
+        @type type_id: int
+        @param epoch: The epoch sent by the server along with the type id.
+        @type epoch: int
+        @return: The class name, module name and methods of the type.
+        @rtype: tuple
+        """
+        connection = self.get(vm)
+        key = self._get_key(vm)
+        with self._lock:
+            if self._type_epochs.get(key) != epoch:
+                # The server restarted, so its type ids may stand for other types
+                self._type_descriptions[key] = {}
+                self._type_epochs[key] = epoch
+            descriptions = self._type_descriptions[key]
+
+        description = descriptions.get(type_id)
+        if description is None:
+            description = connection.describe_type(type_id)
+            descriptions[type_id] = description
+        return description
+
+    def get_attribute_kinds(self, vm):
+        """
+        Get the cache of resolved module attribute kinds for the python build of a virtual machine.
+        @param vm: The target machine
+        @type vm: vmpie.virtual_machine.VirtualMachine
+        @return: A dictionary of dotted attribute name to its kind.
+        @rtype: dict
+        """
+        self.get(vm)
+        return _attribute_kinds_cache.setdefault(self._builds.get(self._get_key(vm)), {})
+
+    def is_connected(self, vm):
+        """
+        @param vm: The target machine
+        @type vm: vmpie.virtual_machine.VirtualMachine
+        @return: Whether a connection to the virtual machine was already made.
+        @rtype: bool
+        """
+        return self._get_key(vm) in self._connections
+
+    def release(self, vm):
+        """
+        Close the connection to a virtual machine, if there is one.
+        @param vm: The target machine
+        @type vm: vmpie.virtual_machine.VirtualMachine
+        """
+        self.flush_releases()
+        with self._lock:
+            connection = self._connections.pop(self._get_key(vm), None)
+            self._type_descriptions.pop(self._get_key(vm), None)
+            self._type_epochs.pop(self._get_key(vm), None)
+        if connection is not None:
+            connection._pyroRelease()
+
+    def close_all(self):
+        """
+        Close all the connections in the pool.
+        """
+        self.flush_releases()
+        with self._lock:
+            connections, self._connections = self._connections.values(), {}
+            self._type_descriptions = {}
+            self._type_epochs = {}
+        for connection in connections:
+            connection._pyroRelease()
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = Thread(target=self._flush_worker, args=())
+                self._flusher.daemon = True
+                self._flusher.start()
+
+    def _flush_worker(self):
+        while True:
+            time.sleep(consts.REMOTE_RELEASE_FLUSH_INTERVAL)
+            self.flush_releases()
+
+            with self._lock:
+                # Stop once there is nothing left to release, the next tracked object starts a new flusher
+                if not self._tracked and not self._released:
+                    self._flusher = None
+                    return
+
+    def _get_key(self, vm):
+        # Managed object ids are only unique within a vCenter
+        return getattr(vm.vcenter, "_host", None), vm._moid
+
+    def _connect(self):
+        Pyro4.config.SERIALIZER = consts.DEFAULT_SERIALIZER
+        connection = Pyro4.Proxy(SERVER_URI)
+
+        # Required by the attribute resolution of remote modules
+        connection.execute("import sys")
+        connection.execute("import inspect")
+        connection.execute("import pickle")
+        return connection
+
+
+connection_pool = _ConnectionPool()
+
+
 class RemotePlugin(plugin.Plugin):
     """
     Provide RPC operations to virtual machines.
+    The connection to the target machine is made on first use, and remote modules are resolved
+    when they're accessed as attributes (ie: vm.remote.os).
     """
     _name = "remote"
     _os = [plugin.UNIX, plugin.WINDOWS]
 
-    def _setup_(self):
+    def __getattr__(self, name):
         """
-        Creates a remote plugin object and injects all the python importable modules on
-        the target machine to the object.
-        @param vm: The target machine
-        @type vm: vmpie.virtual_machine.VirtualMachine
+        Resolve a python module on the target machine.
+        @param name: The name of the module
+        @type name: str
+        @return: The remote module.
+        @rtype: _RemoteModule
         """
-        self.connect()
-        self.load_modules()
+        if name.startswith("_") or "vm" not in self.__dict__:
+            raise AttributeError(name)
+
+        module = _RemoteModule(name, self.vm)
+        # Cache the module so following accesses won't get here
+        setattr(self, name, module)
+        return module
 
     def connect(self):
         """
-        Connects to the Pyro server on the target   machine.
+        Connects to the Pyro server on the target machine.
         @return: Pyro4 proxy to the Pyro server on the target machine.
         @rtype: Pyro4.Proxy
         """
-        Pyro4.config.SERIALIZER = consts.DEFAULT_SERIALIZER
-        # TODO: Don't hardcode the URI
-        self.vm._pyro_daemon = Pyro4.Proxy("PYRO:Vmpie.Server@10.0.0.135:2808")
+        return connection_pool.get(self.vm)
 
+    def disconnect(self):
+        """
+        Close the connection to the Pyro server on the target machine.
+        """
+        connection_pool.release(self.vm)
 
     def load_modules(self):
-        self.vm._pyro_daemon.execute("import inspect")
-        self.vm._pyro_daemon.execute("import pickle")
-
-        # Get all the python importable modules on the target machine and inject them as attributes.
+        """
+        Inject all the python importable modules on the target machine as attributes.
+        Not needed for accessing modules, since they are resolved on access.
+        """
         for module_name in self._get_modules():
             setattr(self, module_name, _RemoteModule(module_name, self.vm))
 
     def is_loaded(self):
-        try:
-            if self.vm._pyro_daemon:
-                return True
-        except Exception:
-            return False
+        return connection_pool.is_connected(self.vm)
+
+    def storage_size(self):
+        """
+        Get the number of objects the server on the target machine keeps for its clients.
+        @return: The number of stored objects.
+        @rtype: int
+        """
+        connection_pool.flush_releases()
+        return unpack(self.vm, self.vm._pyro_daemon.storage_size())
+
+    def evict(self, objects=None):
+        """
+        Remove objects from the server on the target machine, even if they are still referenced.
+        @param objects: The remote objects to remove. Defaults to all the stored objects.
+        @type objects: list
+        """
+        handles = None if objects is None else [obj._RemoteObject__oid for obj in objects]
+        self.vm._pyro_daemon.evict(handles)
+
+    def prefetch(self, module_name, constants=False):
+        """
+        Resolve all the attributes of a module on the target machine in a single call (See _RemoteModule.prefetch).
+        @param module_name: The name of the module
+        @type module_name: str
+        @param constants: Whether to keep the values of the module's constants locally.
+        @type constants: bool
+        @return: The remote module.
+        @rtype: _RemoteModule
+        """
+        module = getattr(self, module_name)
+        module.prefetch(constants=constants)
+        return module
 
     def execute(self, code):
         """
@@ -295,6 +582,8 @@ class RemotePlugin(plugin.Plugin):
 class _RemoteModule(object):
     """
     Represents a remote module on the target machine.
+    The kinds of the accessed attributes are cached per guest python build, and the sub-modules and methods
+    are cached on the module, so only the first access to them makes a call to the target machine.
     """
     def __init__(self, module_name, vm):
         """
@@ -317,27 +606,62 @@ class _RemoteModule(object):
         @return: The matching remote object or the value of the attribute.
         @rtype: RemoteSubModule / RemoteMethod / object (value of the attribute)
         """
+        if item.startswith("__") or "vm" not in self.__dict__:
+            raise AttributeError(item)
+
+        self._import()
+        name = ".".join([self._name, item])
+        kinds = connection_pool.get_attribute_kinds(self.vm)
+        kind = kinds.get(name)
+
+        if kind is None:
+            kind, value = unpack(self.vm, self.vm._pyro_daemon.evaluate(RESOLVE_ATTRIBUTE_EXPRESSION.format(name=name)))
+            kinds[name] = kind
+
+            if kind == VALUE_KIND:
+                return value
+
+        if kind == SUBMODULE_KIND:
+            attribute = _RemoteSubModule(name, self.vm)
+        elif kind == CALLABLE_KIND:
+            attribute = _RemoteMethod(name, self.vm)
+        else:
+            # Item is a regular attribute - return its current value
+            return unpack(self.vm, self.vm._pyro_daemon.evaluate(name))
+
+        # Cache the sub-module or method so following accesses won't get here
+        setattr(self, item, attribute)
+        return attribute
+
+    def prefetch(self, constants=False):
+        """
+        Resolve the kinds of all the attributes of the module in a single call.
+        @param constants: Whether to keep the values of the module's constants (numbers and strings) locally,
+                          so accessing them doesn't make a call. Only use it for modules whose constants don't change.
+        @type constants: bool
+        """
+        self._import()
+        manifest = unpack(self.vm, self.vm._pyro_daemon.evaluate(MODULE_MANIFEST_EXPRESSION.format(name=self._name)))
+        kinds = connection_pool.get_attribute_kinds(self.vm)
+
+        for item, kind, is_constant, value in manifest:
+            kinds[".".join([self._name, item])] = kind
+
+            # Don't hide the local attributes of the module object
+            if constants and is_constant and item not in self.__dict__ and not hasattr(type(self), item):
+                setattr(self, item, value)
+
+    def _import(self):
         # Import the module of it hasn't been loaded yet (caching)
         if not self._imported:
             unpack(self.vm, self.vm._pyro_daemon.execute("import %s" % self._name))
             self._imported = True
 
-        # Check if item is a sub-module
-        if unpack(self.vm, self.vm._pyro_daemon.evaluate("inspect.ismodule(%s.%s)" % (self._name, item))):
-            return _RemoteSubModule(".".join([self._name, item]), self.vm)
-
-        # Check if item is a method
-        elif unpack(self.vm, self.vm._pyro_daemon.evaluate("callable(%s.%s)" % (self._name, item))):
-            return _RemoteMethod(".".join([self._name, item]), self.vm)
-
-        # Item is a regular attribute - return its value
-        return unpack(self.vm, self.vm._pyro_daemon.evaluate("%s.%s" % (self._name, item)))
-
     def __str__(self):
         return "Module '{name}' on VM '{vm}'".format(name=self._name, vm=self.vm.name)
 
 
-class _RemoteSubModule(object):
+class _RemoteSubModule(_RemoteModule):
     """
     Represents a remote sub-module on the target machine.
     """
@@ -349,31 +673,9 @@ class _RemoteSubModule(object):
         @param vm: The target machine
         @type vm: vmpie.virtual_machine.VirtualMachine
         """
-        self._name = module_name
-        self.vm = vm
-
-    def __getattr__(self, item):
-        """
-        Detects the type of the desired attribute (sub-module, method or attribute) and returns
-        the corresponding object.
-        @param item: The desired attribute
-        @type item: str
-        @return: The matching remote object or the value of the attribute.
-        @rtype: RemoteSubModule / RemoteMethod / object (value of the attribute)
-        """
-        # Check if item is a sub-module
-        if unpack(self.vm, self.vm._pyro_daemon.evaluate("inspect.ismodule(%s.%s)" % (self._name, item))):
-            return _RemoteSubModule(".".join([self._name, item]), self.vm)
-
-        # Check if item is a method
-        elif unpack(self.vm, self.vm._pyro_daemon.evaluate("inspect.isfunction(%s.%s)" % (self._name, item))):
-            return _RemoteMethod(".".join([self._name, item]), self.vm)
-
-        # Item is a regular attribute - return its value
-        return unpack(self.vm, self.vm._pyro_daemon.evaluate("%s.%s" % (self._name, item)))
-
-    def __str__(self):
-        return "Module '{name}' on VM '{vm}'".format(name=self._name, vm=self.vm.name)
+        super(_RemoteSubModule, self).__init__(module_name, vm)
+        # Sub-modules are reached through their already imported parent
+        self._imported = True
 
 
 class _RemoteMethod(object):
@@ -443,7 +745,8 @@ class _RemoteObject(object):
         self.__module_name = module_name
         self.__methods = methods
 
-    normalized_builtin_types = {}
+    # Proxy classes by (class, module name, class name, method names)
+    _class_proxy_cache = {}
 
     def __getattribute__(self, name):
         return object.__getattribute__(self, name)
@@ -492,8 +795,13 @@ class _RemoteObject(object):
     @classmethod
     def _create_class_proxy(cls, oid, vm, class_name, module_name, methods):
         """
-        creates a proxy for the given class
+        creates a proxy for the given class, or returns the cached proxy of a class with the same methods
         """
+        key = (cls, module_name, class_name, tuple(name for name, doc in methods))
+        theclass = cls._class_proxy_cache.get(key)
+        if theclass is not None:
+            return theclass
+
         def make_method(name):
             def method(self, *args, **kwargs):
                 args = [pack(arg) for arg in args]
@@ -507,17 +815,15 @@ class _RemoteObject(object):
             namespace[name] = make_method(name)
             namespace[name].__doc__ = doc
 
-        normalized_builtin_types = dict(((t.__name__, t.__module__), t) for t in _BUILTIN_TYPES)
-
         namespace["__module__"] = module_name
         if module_name in sys.modules and hasattr(sys.modules[module_name], class_name):
             namespace["__class__"] = getattr(sys.modules[module_name], class_name)
-        elif (class_name, module_name) in normalized_builtin_types:
-            namespace["__class__"] = normalized_builtin_types[class_name, module_name]
+        elif (class_name, module_name) in _NORMALIZED_BUILTIN_TYPES:
+            namespace["__class__"] = _NORMALIZED_BUILTIN_TYPES[class_name, module_name]
         else:
             namespace["__class__"] = None
 
-        return type(class_name, (cls,), namespace)
+        return cls._class_proxy_cache.setdefault(key, type(class_name, (cls,), namespace))
 
     def __new__(cls, oid, vm, class_name, module_name, methods, *args, **kwargs):
         """
@@ -0,0 +1,218 @@
+# ==================================================================================================================== #
+# File Name     : bulk.py
+# Purpose       : Run an operation on many virtual machines with a bounded number of running tasks.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import logging
+from collections import deque
+
+from pyVmomi import vim
+
+import consts
+import utils
+import collector
+import task_waiter
+
+# ==================================================== CONSTANTS ===================================================== #
+
+SUCCESS = "success"
+ERROR = "error"
+PLACEMENT_PROPERTIES = ["runtime.host", "datastore"]
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class BulkResult(object):
+    """
+    The outcome of an operation on a single virtual machine.
+    """
+    def __init__(self, vm):
+        self.vm = vm
+        self.task = None
+        self.state = None
+        self.result = None
+        self.error = None
+
+    @property
+    def is_success(self):
+        return self.state == SUCCESS
+
+    def __str__(self):
+        return '<BulkResult: {vm}, {state}>'.format(vm=self.vm.name, state=self.state)
+
+    def __repr__(self):
+        return '<BulkResult: {vm}, {state}>'.format(vm=self.vm.name, state=self.state)
+
+
+class _Placement(object):
+    """
+    Count the running tasks of every host and datastore.
+    """
+    def __init__(self, per_host_limit, per_datastore_limit):
+        self._per_host_limit = per_host_limit
+        self._per_datastore_limit = per_datastore_limit
+        self._hosts = {}
+        self._datastores = {}
+
+    def can_start(self, host, datastores):
+        if self._per_host_limit is not None and host is not None and \
+                self._hosts.get(host, 0) >= self._per_host_limit:
+            return False
+
+        if self._per_datastore_limit is not None:
+            for datastore in datastores:
+                if self._datastores.get(datastore, 0) >= self._per_datastore_limit:
+                    return False
+
+        return True
+
+    def acquire(self, host, datastores):
+        if host is not None:
+            self._hosts[host] = self._hosts.get(host, 0) + 1
+        for datastore in datastores:
+            self._datastores[datastore] = self._datastores.get(datastore, 0) + 1
+
+    def release(self, host, datastores):
+        if host is not None:
+            self._hosts[host] -= 1
+        for datastore in datastores:
+            self._datastores[datastore] -= 1
+
+# ==================================================== FUNCTIONS ===================================================== #
+
+
+def run(vms, op, max_in_flight=consts.BULK_MAX_IN_FLIGHT, per_host_limit=None, per_datastore_limit=None,
+        callback=None, vcenter=None):
+    """
+    Run an operation on many virtual machines, keeping a bounded number of tasks running at once.
+    A new task is started as soon as a running task completes, so the vCenter's task queue is never flooded
+    and the operation never waits for the slowest task of a batch, ie:
+        results = bulk.run(vms, "power_on", max_in_flight=20, per_host_limit=4)
+    @param vms: The virtual machines.
+    @type vms: I{list of vmpie.virtual_machine.VirtualMachine}
+    @param op: The name of a HardwarePlugin method (ie: "power_on"), or a function that receives a virtual machine
+               and returns its task (ie: lambda vm: vm.hardware.rename(vm.name + "-old")).
+               Operations that return no task are completed once they return.
+    @type op: I{str / callable}
+    @param max_in_flight: The maximum number of running tasks.
+    @type max_in_flight: I{int}
+    @param per_host_limit: The maximum number of running tasks on the vms of a single host. None is unlimited.
+    @type per_host_limit: I{int}
+    @param per_datastore_limit: The maximum number of running tasks on the vms of a single datastore.
+                                None is unlimited.
+    @type per_datastore_limit: I{int}
+    @param callback: A function called with the result of every vm once it completes,
+                     the number of completed vms and the total number of vms.
+    @type callback: I{callable}
+    @param vcenter: The vCenter of the vms. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: The results of the operation, in the order of the vms.
+    @rtype: I{list of BulkResult}
+    @raise ValueError: If a limit is lower than 1, since no task could ever start.
+    """
+    for limit_name, limit in [("max_in_flight", max_in_flight), ("per_host_limit", per_host_limit),
+                              ("per_datastore_limit", per_datastore_limit)]:
+        if limit is not None and limit < 1:
+            raise ValueError("{name} must be at least 1, got {limit}.".format(name=limit_name, limit=limit))
+
+    vcenter = vcenter or utils.get_vcenter()
+    results = [BulkResult(vm) for vm in vms]
+
+    if isinstance(op, basestring):
+        method_name = op
+        op = lambda vm: getattr(vm.hardware, method_name)()
+
+    placements = _get_placements(vms, per_host_limit, per_datastore_limit, vcenter)
+    placement = _Placement(per_host_limit, per_datastore_limit)
+    queue = deque(range(len(vms)))
+    # Running vms, by the managed object id of their task
+    running = {}
+    progress = [0]
+
+    def complete(index, state, result=None, error=None):
+        results[index].state = state
+        results[index].result = result
+        results[index].error = error
+        progress[0] += 1
+
+        if callback is not None:
+            try:
+                callback(results[index], progress[0], len(results))
+            except Exception:
+                logging.error("Bulk operation callback failed.", exc_info=True)
+
+    waiter = task_waiter.TaskWaiter(vcenter)
+    try:
+        while queue or running:
+            # Start every queued vm that fits in the limits, keeping the original order otherwise
+            blocked = deque()
+            while queue and len(running) < max_in_flight:
+                index = queue.popleft()
+                host, datastores = placements.get(vms[index]._moid, (None, []))
+
+                if not placement.can_start(host, datastores):
+                    blocked.append(index)
+                    continue
+
+                try:
+                    started_task = op(vms[index])
+                    pyvmomi_task = getattr(started_task, "_pyVmomiTask", started_task)
+                    if started_task is not None and not isinstance(pyvmomi_task, vim.Task):
+                        raise TypeError("Bulk operations should return a task or None, got {result!r}.".format(
+                            result=started_task))
+                except Exception as exc:
+                    logging.warning("Bulk operation failed on vm {vm}.".format(vm=vms[index].name), exc_info=True)
+                    complete(index, ERROR, error=exc)
+                    continue
+
+                if started_task is None:
+                    complete(index, SUCCESS)
+                    continue
+
+                results[index].task = started_task
+                running[pyvmomi_task._moId] = index
+                placement.acquire(host, datastores)
+                waiter.add([pyvmomi_task])
+
+            blocked.extend(queue)
+            queue = blocked
+
+            if not running:
+                continue
+
+            for task_result in waiter.poll(consts.TASK_WAITER_MAX_WAIT):
+                index = running.pop(task_result.task._moId)
+                waiter.pop_result(task_result.task)
+                placement.release(*placements.get(vms[index]._moid, (None, [])))
+
+                if task_result.is_success:
+                    complete(index, SUCCESS, result=task_result.result)
+                else:
+                    complete(index, ERROR, error=task_result.error)
+    finally:
+        waiter.close()
+
+    return results
+
+
+def _get_placements(vms, per_host_limit, per_datastore_limit, vcenter):
+    """
+    Get the host and datastores of the vms in a single property collector call, if any limit needs them.
+    @return: A dictionary of vm managed object id to a (host id, datastore ids) tuple.
+    @rtype: I{dict}
+    """
+    if per_host_limit is None and per_datastore_limit is None:
+        return {}
+
+    properties = collector.retrieve_objects_properties([vm._pyVmomiVM for vm in vms], vim.VirtualMachine,
+                                                       PLACEMENT_PROPERTIES, vcenter=vcenter)
+    placements = {}
+    for moid, props in properties.iteritems():
+        host = props.get("runtime.host")
+        placements[moid] = (host._moId if host is not None else None,
+                            [datastore._moId for datastore in props.get("datastore") or []])
+
+    return placements
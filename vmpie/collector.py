@@ -0,0 +1,330 @@
+# ==================================================================================================================== #
+# File Name     : collector.py
+# Purpose       : Provide bulk property retrieval through the vSphere PropertyCollector.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+from pyVmomi import vim
+from pyVmomi import vmodl
+
+import consts
+import utils
+
+# ==================================================== CONSTANTS ===================================================== #
+
+DATACENTER_FOLDERS = ["vmFolder", "hostFolder", "datastoreFolder", "networkFolder"]
+FOLDER_TRAVERSAL_NAME = "folderTraversal"
+PARENT_TRAVERSAL_NAME = "parentTraversal"
+DATASTORE_VMS_TRAVERSAL_NAME = "datastoreVms"
+
+# ==================================================== FUNCTIONS ===================================================== #
+
+
+def to_dict(object_content):
+    """
+    Convert the property set of a retrieved object to a dictionary.
+    @param object_content: A single result of a property collector call.
+    @type object_content: I{vmodl.query.PropertyCollector.ObjectContent}
+    @return: The retrieved properties, keyed by their property path.
+    @rtype: I{dict}
+    """
+    return dict((prop.name, prop.val) for prop in object_content.propSet or [])
+
+
+def create_container_filter_spec(view, vimtypes, path_set):
+    """
+    Create a filter spec that collects properties of every object in a container view.
+    @param view: The container view to traverse.
+    @type view: I{vim.view.ContainerView}
+    @param vimtypes: The types of the objects in the view.
+    @type vimtypes: I{list}
+    @param path_set: The property paths to collect for every type.
+    @type path_set: I{list}
+    @return: The filter spec.
+    @rtype: I{vmodl.query.PropertyCollector.FilterSpec}
+    """
+    traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+        name="traverseView",
+        path="view",
+        skip=False,
+        type=vim.view.ContainerView
+    )
+    object_spec = vmodl.query.PropertyCollector.ObjectSpec(
+        obj=view,
+        skip=True,
+        selectSet=[traversal_spec]
+    )
+    property_specs = [
+        vmodl.query.PropertyCollector.PropertySpec(type=vimtype, pathSet=list(path_set), all=False)
+        for vimtype in vimtypes
+    ]
+
+    return vmodl.query.PropertyCollector.FilterSpec(objectSet=[object_spec], propSet=property_specs)
+
+
+def iter_pages(filter_spec, page_size=consts.DEFAULT_PAGE_SIZE, vcenter=None):
+    """
+    Retrieve properties using RetrievePropertiesEx and yield the results one page at a time.
+    If the generator is closed before the last page is consumed, the remaining results are cancelled on the server.
+    @param filter_spec: The filter spec describing which objects and properties to collect.
+    @type filter_spec: I{vmodl.query.PropertyCollector.FilterSpec}
+    @param page_size: The maximum number of objects returned in a single page.
+    @type page_size: I{int}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A generator of pages, each page is a list of I{ObjectContent}.
+    @rtype: I{generator}
+    """
+    vcenter = vcenter or utils.get_vcenter()
+    property_collector = vcenter._connection.content.propertyCollector
+    options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+
+    result = property_collector.RetrievePropertiesEx(specSet=[filter_spec], options=options)
+    token = None
+
+    try:
+        while result is not None:
+            token = result.token
+            yield result.objects
+
+            if token is None:
+                break
+
+            result = property_collector.ContinueRetrievePropertiesEx(token=token)
+            token = None
+
+    finally:
+        # Release the server side result set if the caller stopped early
+        if token is not None:
+            property_collector.CancelRetrievePropertiesEx(token=token)
+
+
+def iter_container_properties(vimtypes, path_set, container=None, page_size=consts.DEFAULT_PAGE_SIZE, vcenter=None):
+    """
+    Yield the properties of every object of the given types in a container, one page at a time.
+    @param vimtypes: The types of the objects to collect.
+    @type vimtypes: I{list}
+    @param path_set: The property paths to collect.
+    @type path_set: I{list}
+    @param container: The folder to search in recursively. Defaults to the root folder.
+    @type container: I{vim.ManagedEntity}
+    @param page_size: The maximum number of objects returned in a single page.
+    @type page_size: I{int}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A generator of pages, each page is a list of (pyVmomi object, properties dictionary) tuples.
+    @rtype: I{generator}
+    """
+    vcenter = vcenter or utils.get_vcenter()
+    content = vcenter._connection.content
+    view = content.viewManager.CreateContainerView(
+        container=container or content.rootFolder,
+        type=vimtypes,
+        recursive=True
+    )
+
+    try:
+        filter_spec = create_container_filter_spec(view, vimtypes, path_set)
+        for page in iter_pages(filter_spec, page_size=page_size, vcenter=vcenter):
+            yield [(object_content.obj, to_dict(object_content)) for object_content in page]
+
+    finally:
+        view.DestroyView()
+
+
+def retrieve_container_properties(vimtypes, path_set, container=None, vcenter=None):
+    """
+    Retrieve the properties of every object of the given types in a container.
+    @param vimtypes: The types of the objects to collect.
+    @type vimtypes: I{list}
+    @param path_set: The property paths to collect.
+    @type path_set: I{list}
+    @param container: The folder to search in recursively. Defaults to the root folder.
+    @type container: I{vim.ManagedEntity}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A list of (pyVmomi object, properties dictionary) tuples.
+    @rtype: I{list}
+    """
+    objects = []
+    for page in iter_container_properties(vimtypes, path_set, container=container, vcenter=vcenter):
+        objects.extend(page)
+    return objects
+
+
+def create_hierarchy_filter_spec(root):
+    """
+    Create a filter spec that collects the folders and datacenters under a root folder (recursively),
+    including the root itself.
+    @param root: The folder to start from.
+    @type root: I{vim.Folder}
+    @return: The filter spec.
+    @rtype: I{vmodl.query.PropertyCollector.FilterSpec}
+    """
+    datacenter_traversals = [
+        vmodl.query.PropertyCollector.TraversalSpec(
+            name="datacenter_{path}".format(path=path),
+            type=vim.Datacenter,
+            path=path,
+            skip=False,
+            selectSet=[vmodl.query.PropertyCollector.SelectionSpec(name=FOLDER_TRAVERSAL_NAME)]
+        )
+        for path in DATACENTER_FOLDERS
+    ]
+    folder_traversal = vmodl.query.PropertyCollector.TraversalSpec(
+        name=FOLDER_TRAVERSAL_NAME,
+        type=vim.Folder,
+        path="childEntity",
+        skip=False,
+        selectSet=[vmodl.query.PropertyCollector.SelectionSpec(name=FOLDER_TRAVERSAL_NAME)] +
+                  [vmodl.query.PropertyCollector.SelectionSpec(name=spec.name) for spec in datacenter_traversals]
+    )
+    object_spec = vmodl.query.PropertyCollector.ObjectSpec(
+        obj=root,
+        skip=False,
+        selectSet=[folder_traversal] + datacenter_traversals
+    )
+    property_specs = [
+        vmodl.query.PropertyCollector.PropertySpec(type=vim.Folder, pathSet=["name", "parent", "childEntity"]),
+        vmodl.query.PropertyCollector.PropertySpec(type=vim.Datacenter, pathSet=["name", "parent"] + DATACENTER_FOLDERS)
+    ]
+
+    return vmodl.query.PropertyCollector.FilterSpec(objectSet=[object_spec], propSet=property_specs)
+
+
+def retrieve_hierarchy(root=None, vcenter=None):
+    """
+    Retrieve the folders and datacenters under a root folder (recursively) in a single property collector call.
+    @param root: The folder to start from. Defaults to the root folder.
+    @type root: I{vim.Folder}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A dictionary of managed object id to (pyVmomi object, properties dictionary).
+    @rtype: I{dict}
+    """
+    vcenter = vcenter or utils.get_vcenter()
+    root = root or vcenter._connection.content.rootFolder
+    hierarchy = {}
+
+    for page in iter_pages(create_hierarchy_filter_spec(root), vcenter=vcenter):
+        for object_content in page:
+            hierarchy[object_content.obj._moId] = (object_content.obj, to_dict(object_content))
+
+    return hierarchy
+
+
+def retrieve_objects_properties(objs, vimtype, path_set, vcenter=None):
+    """
+    Retrieve properties of a list of objects in a single property collector call.
+    @param objs: The objects.
+    @type objs: I{list}
+    @param vimtype: The type of the objects, ie: vim.VirtualMachine
+    @type vimtype: I{type}
+    @param path_set: The property paths to collect.
+    @type path_set: I{list}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A dictionary of managed object id to properties dictionary.
+    @rtype: I{dict}
+    """
+    if not objs:
+        return {}
+
+    object_specs = [vmodl.query.PropertyCollector.ObjectSpec(obj=obj, skip=False) for obj in objs]
+    property_spec = vmodl.query.PropertyCollector.PropertySpec(type=vimtype, pathSet=list(path_set))
+    filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=object_specs, propSet=[property_spec])
+
+    properties = {}
+    for page in iter_pages(filter_spec, vcenter=vcenter):
+        for object_content in page:
+            properties[object_content.obj._moId] = to_dict(object_content)
+
+    return properties
+
+
+def retrieve_parent_chain(obj, path_set=("name", "parent"), vcenter=None):
+    """
+    Retrieve properties of an inventory object and all of its ancestors in a single property collector call.
+    @param obj: The inventory object.
+    @type obj: I{vim.ManagedEntity}
+    @param path_set: The property paths to collect.
+    @type path_set: I{list}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A list of (pyVmomi object, properties dictionary) tuples.
+    @rtype: I{list}
+    """
+    parent_traversal = vmodl.query.PropertyCollector.TraversalSpec(
+        name=PARENT_TRAVERSAL_NAME,
+        type=vim.ManagedEntity,
+        path="parent",
+        skip=False,
+        selectSet=[vmodl.query.PropertyCollector.SelectionSpec(name=PARENT_TRAVERSAL_NAME)]
+    )
+    object_spec = vmodl.query.PropertyCollector.ObjectSpec(obj=obj, skip=False, selectSet=[parent_traversal])
+    property_spec = vmodl.query.PropertyCollector.PropertySpec(type=vim.ManagedEntity, pathSet=list(path_set))
+    filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=[object_spec], propSet=[property_spec])
+
+    chain = []
+    for page in iter_pages(filter_spec, vcenter=vcenter):
+        chain.extend((object_content.obj, to_dict(object_content)) for object_content in page)
+
+    return chain
+
+
+def retrieve_datastore_vms(datastores=None, vcenter=None):
+    """
+    Retrieve the virtual machines of datastores, and their names, in a single property collector call.
+    @param datastores: The datastores. Defaults to all the datastores in the vCenter.
+    @type datastores: I{list}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A dictionary of managed object id to (pyVmomi object, properties dictionary), containing both the
+             datastores (with their "name" and "vm" properties) and their virtual machines (with their "name").
+    @rtype: I{dict}
+    """
+    vcenter = vcenter or utils.get_vcenter()
+    content = vcenter._connection.content
+    view = None
+
+    datastore_vms_traversal = vmodl.query.PropertyCollector.TraversalSpec(
+        name=DATASTORE_VMS_TRAVERSAL_NAME,
+        type=vim.Datastore,
+        path="vm",
+        skip=False
+    )
+
+    if datastores is None:
+        view = content.viewManager.CreateContainerView(container=content.rootFolder, type=[vim.Datastore],
+                                                       recursive=True)
+        view_traversal = vmodl.query.PropertyCollector.TraversalSpec(
+            name="traverseView",
+            path="view",
+            skip=False,
+            type=vim.view.ContainerView,
+            selectSet=[datastore_vms_traversal]
+        )
+        object_specs = [vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[view_traversal])]
+    else:
+        object_specs = [vmodl.query.PropertyCollector.ObjectSpec(obj=datastore, skip=False,
+                                                                 selectSet=[datastore_vms_traversal])
+                        for datastore in datastores]
+
+    property_specs = [
+        vmodl.query.PropertyCollector.PropertySpec(type=vim.Datastore, pathSet=["name", "vm"]),
+        vmodl.query.PropertyCollector.PropertySpec(type=vim.VirtualMachine, pathSet=["name"])
+    ]
+    filter_spec = vmodl.query.PropertyCollector.FilterSpec(objectSet=object_specs, propSet=property_specs)
+    objects = {}
+
+    try:
+        for page in iter_pages(filter_spec, vcenter=vcenter):
+            for object_content in page:
+                objects[object_content.obj._moId] = (object_content.obj, to_dict(object_content))
+    finally:
+        if view is not None:
+            view.DestroyView()
+
+    return objects
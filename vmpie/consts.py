@@ -2,6 +2,10 @@ from os import path
 
 SPINNER_SLEEP = 0.1
 SESSION_KEEPER_TIMEOUT = 30
+SESSION_POOL_SIZE = 8
+SESSION_POOL_IDLE_TIMEOUT = 600
+SESSION_VALIDITY_TIMEOUT = 300
+SESSION_CACHE_FOLDER = path.join(path.expanduser("~"), ".vmpie", "sessions")
 SUCCESS_RESPONSE_CODE = 200
 SUCCESS_STATE = 'success'
 DEFAULT_GUEST_USERNAME = 'CSI-USER'
@@ -22,4 +26,20 @@ PLUGIN_PATH_ATTRIBUTE = "path"
 PLUGIN_NAME_ATTRIBUTE = "name"
 PLUGIN_OS_ATTRIBUTE = "os"
 DEFAULT_SERIALIZER = "pickle"
+REMOTE_RELEASE_BATCH_SIZE = 100
+REMOTE_RELEASE_FLUSH_INTERVAL = 5
+
+# Property Collector
+DEFAULT_PAGE_SIZE = 1000
+VM_INVENTORY_PROPERTIES = [
+    "name",
+    "config.template",
+    "config.guestFullName",
+    "config.files.vmPathName",
+    "summary.config.guestId",
+]
+NAME_INDEX_WAIT_SECONDS = 60
+DATASTORE_REFRESH_TTL = 300
+TASK_WAITER_MAX_WAIT = 30
+BULK_MAX_IN_FLIGHT = 16
 
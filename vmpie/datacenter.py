@@ -17,7 +17,8 @@ class Datacenter(object):
         # Get names of the folders in datacenters
         self._folders = folder.Folder('vm').folders
         # Get datastores for the datacenter
-        self.datastores = [datastore.Datastore(ds.name) for ds in self.pyVmomiDatacenter.datastore]
+        self.datastores = [datastore.Datastore(ds.name, _pyVmomiDatastore=ds)
+                           for ds in self.pyVmomiDatacenter.datastore]
 
     def add_nfs_datastore(self, name, remote_host, remote_path, read_only=False, username=None, password=None):
 
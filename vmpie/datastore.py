@@ -1,25 +1,107 @@
+import time
+from threading import Lock
 from pyVmomi import vim
-from pyVmomi import vmodl
 
+import consts
 import utils
+import collector
 import virtual_machine
 import vmpie_exceptions
 
+# The last time the storage info of each datastore was refreshed, by (vCenter, managed object id)
+_storage_refresh_times = {}
+_storage_refresh_lock = Lock()
+
+
+def refresh_storage_info(pyVmomiDatastore, ttl=consts.DATASTORE_REFRESH_TTL, vcenter=None):
+    """
+    Refresh the storage info of a datastore, unless it was refreshed in the last ttl seconds.
+    @param pyVmomiDatastore: The datastore.
+    @type pyVmomiDatastore: I{vim.Datastore}
+    @param ttl: The number of seconds a refresh is valid for. 0 forces a refresh.
+    @type ttl: I{int}
+    @param vcenter: The vCenter of the datastore. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    """
+    key = (vcenter or utils.get_vcenter(), pyVmomiDatastore._moId)
+
+    with _storage_refresh_lock:
+        last_refresh = _storage_refresh_times.get(key)
+        if last_refresh is not None and time.time() - last_refresh < ttl:
+            return
+        # Claim the refresh, so concurrent callers don't refresh the same datastore again
+        _storage_refresh_times[key] = time.time()
+
+    try:
+        # Refreshes all storage related information including free-space,
+        # capacity, and detailed usage of virtual machines.
+        pyVmomiDatastore.RefreshDatastoreStorageInfo()
+    except Exception:
+        with _storage_refresh_lock:
+            _storage_refresh_times.pop(key, None)
+        raise
+
+
+def get_vms_by_datastore(datastores=None, refresh=False, vcenter=None):
+    """
+    Get the virtual machines of many datastores using a single property collector call.
+    @param datastores: The datastores. Defaults to all the datastores in the vCenter.
+    @type datastores: I{list of vim.Datastore / Datastore}
+    @param refresh: Whether to refresh the storage info of the datastores first (at most once per TTL).
+    @type refresh: I{bool}
+    @param vcenter: The vCenter to query. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A dictionary of datastore managed object id to a list of lightweight virtual machine handles.
+    @rtype: I{dict}
+    """
+    vcenter = vcenter or utils.get_vcenter()
+
+    if datastores is not None:
+        datastores = [ds._pyVmomiDatastore if isinstance(ds, Datastore) else ds for ds in datastores]
+
+    if refresh:
+        # Refreshed before collecting, so the collected vms are the refreshed ones
+        refreshed = datastores
+        if refreshed is None:
+            refreshed = [obj for obj, _ in collector.retrieve_container_properties([vim.Datastore], ["name"],
+                                                                                   vcenter=vcenter)]
+        for pyVmomiDatastore in refreshed:
+            refresh_storage_info(pyVmomiDatastore, vcenter=vcenter)
+
+    objects = collector.retrieve_datastore_vms(datastores, vcenter=vcenter)
+
+    vms_by_datastore = {}
+    for obj, properties in objects.itervalues():
+        if isinstance(obj, vim.Datastore):
+            # Datastore names are only unique within a datacenter
+            vms_by_datastore[obj._moId] = []
+            for vm in properties.get("vm", []):
+                # Virtual machines deleted during the call, or inaccessible and orphaned ones, won't have a name
+                name = objects[vm._moId][1].get("name") if vm._moId in objects else None
+                if name is None:
+                    continue
+                vms_by_datastore[obj._moId].append(virtual_machine.VirtualMachineHandle(name, _pyVmomiVM=vm,
+                                                                                        _vcenter=vcenter))
+
+    return vms_by_datastore
+
 
 class Datastore(object):
 
-    def __init__(self, datastore_name, _pyVmomiDatastore=None):
+    def __init__(self, datastore_name, _pyVmomiDatastore=None, _vcenter=None):
 
         # Name of the datastore
         self.name = datastore_name
+        self.vcenter = _vcenter or utils.get_vcenter()
 
         if isinstance(_pyVmomiDatastore, vim.Datastore):
             self._pyVmomiDatastore = _pyVmomiDatastore
         else:
             # Get pyVmomi object
-            self.__pyVmomiDatastore = utils.get_obj_by_name(
+            self._pyVmomiDatastore = utils.get_obj_by_name(
                 name=datastore_name,
-                vimtypes=[vim.Datastore]
+                vimtypes=[vim.Datastore],
+                vcenter=self.vcenter
             )
 
         self._moId = self._pyVmomiDatastore._moId
@@ -29,20 +111,17 @@ class Datastore(object):
 
     @property
     def vms(self):
-        # Refreshes all storage related information including free-space,
-        # capacity, and detailed usage of virtual machines.
-        self._pyVmomiDatastore.RefreshDatastoreStorageInfo()
-
-        for vm in self._pyVmomiDatastore.vm:
-            if isinstance(vm, vim.VirtualMachine):
-                try:
-                    self._vms.append(virtual_machine.VirtualMachine(vm.name, _pyvmomiVm=vm))
-                except vmodl.fault.ManagedObjectNotFound:
-                    # Handle cases in which a vm is deleted while iterating
-                    continue
-
+        """
+        The virtual machines on the datastore, as lightweight handles (See VirtualMachineHandle.load).
+        The storage info is refreshed at most once per consts.DATASTORE_REFRESH_TTL seconds.
+        """
+        self.refresh_storage_info()
+        self._vms = get_vms_by_datastore([self._pyVmomiDatastore], vcenter=self.vcenter).get(self._moId, [])
         return self._vms
 
+    def refresh_storage_info(self, ttl=consts.DATASTORE_REFRESH_TTL):
+        refresh_storage_info(self._pyVmomiDatastore, ttl=ttl, vcenter=self.vcenter)
+
     @property
     def free_space(self):
         self._pyVmomiDatastore.RefreshDatastore()
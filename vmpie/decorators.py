@@ -1,11 +1,30 @@
+from pyVmomi import vim
+
 import utils
 import vmpie_exceptions
 
 
+def _get_vcenter(obj):
+    """
+    Get the vCenter of a vmpie object, or of the vm of a plugin. Defaults to the connected vCenter.
+    """
+    vcenter = getattr(obj, "vcenter", None) or getattr(getattr(obj, "vm", None), "vcenter", None)
+    return vcenter or utils.get_vcenter()
+
+
 def connected(func):
     def wrapper(*args, **kwargs):
-        vcenter = utils.get_vcenter()
-        if vcenter.is_connected():
-            return func(*args, **kwargs)
-        raise vmpie_exceptions.NotConnectedException
+        vcenter = _get_vcenter(args[0] if args else None)
+        if not vcenter.is_connected():
+            raise vmpie_exceptions.NotConnectedException
+
+        try:
+            result = func(*args, **kwargs)
+        except vim.fault.NotAuthenticated:
+            # The session has expired, login again and replay the call
+            vcenter.renew_session()
+            result = func(*args, **kwargs)
+
+        vcenter.mark_active()
+        return result
     return wrapper
@@ -1,5 +1,4 @@
 from pyVmomi import vim
-import os
 
 # To prevent import loops
 import virtual_machine
@@ -8,15 +7,17 @@ import utils
 
 class Folder(object):
 
-    def __init__(self, folder_name, _pyVmomiFolder=None):
+    def __init__(self, folder_name, _pyVmomiFolder=None, _vcenter=None):
 
         self.name = folder_name
+        self.vcenter = _vcenter or utils.get_vcenter()
         if isinstance(_pyVmomiFolder, vim.Folder):
             self._pyVmomiFolder = _pyVmomiFolder
         else:
             self._pyVmomiFolder = utils.get_obj_by_name(
                 name=folder_name,
-                vimtypes=[vim.Folder]
+                vimtypes=[vim.Folder],
+                vcenter=self.vcenter
             )
 
         if isinstance(self._pyVmomiFolder.parent, vim.Folder):
@@ -32,14 +33,16 @@ class Folder(object):
     @property
     def parent(self):
         if isinstance(self._parent, str):
-            self._parent = Folder(self._parent)
+            self._parent = Folder(self._parent, _vcenter=self.vcenter)
         return self._parent
 
     @property
     def folders(self):
+        self._folders = []
         for folder in self._pyVmomiFolder.childEntity:
             if isinstance(folder, vim.Folder):
-                self._folders.append(Folder(folder.name))
+                # Pass the child object to avoid looking it up by name
+                self._folders.append(Folder(folder.name, _pyVmomiFolder=folder, _vcenter=self.vcenter))
         return self._folders
 
     @property
@@ -47,32 +50,30 @@ class Folder(object):
         self._vms = []
         for vm in self._pyVmomiFolder.childEntity:
             if isinstance(vm, vim.VirtualMachine):
-                self._vms.append(virtual_machine.VirtualMachine(vm.name))
+                self._vms.append(virtual_machine.VirtualMachine(vm.name, _vcenter=self.vcenter))
         return self._vms
 
     @property
     def path(self):
-        path = []
-        current_object = self
-        while current_object.parent:
-            path.append(current_object.name)
-            current_object = current_object.parent
-        self._path = os.path.join(*path[::-1])
+        self._path = self.vcenter.parent_cache.path(self._pyVmomiFolder)
         return self._path
 
     def clone(self):
         pass
 
     def move(self, destination_folder_name):
-        destination = Folder(destination_folder_name)
-        destination._pyVmomiFolder.MoveIntoFolder_Task([self._pyVmomiFolder])
+        destination = Folder(destination_folder_name, _vcenter=self.vcenter)
+        move_task = destination._pyVmomiFolder.MoveIntoFolder_Task([self._pyVmomiFolder])
+        self.vcenter.invalidate_parents(move_task, self._pyVmomiFolder)
         self._path = None
 
     def destroy(self):
         self._pyVmomiFolder.Destroy_Task()
 
     def rename(self, name):
-        self._pyVmomiFolder.renameTask(newName=name)
+        rename_task = self._pyVmomiFolder.Rename_Task(newName=name)
+        self.vcenter.invalidate_parents(rename_task, self._pyVmomiFolder)
+        self.name = name
 
     def create_subfolder(self, subfolder_name):
         self._pyVmomiFolder.CreateFolder(name=subfolder_name)
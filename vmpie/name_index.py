@@ -0,0 +1,216 @@
+# ==================================================================================================================== #
+# File Name     : name_index.py
+# Purpose       : Provide a live index of inventory objects by their type and name.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import logging
+from threading import Thread, Lock
+
+from pyVmomi import vim
+from pyVmomi import vmodl
+
+import consts
+import collector
+
+# ==================================================== CONSTANTS ===================================================== #
+
+INDEXED_TYPES = [vim.VirtualMachine, vim.Folder, vim.Datastore, vim.Datacenter, vim.ResourcePool]
+INDEXED_PROPERTIES = ["name", "parent"]
+LEAVE_KIND = "leave"
+REMOVE_OPERATION = "remove"
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class _Entry(object):
+    """
+    An indexed inventory object.
+    """
+    __slots__ = ["obj", "name", "parent"]
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.name = None
+        self.parent = None
+
+
+class NameIndex(object):
+    """
+    Map the names of inventory objects to their pyVmomi object and parent.
+    The index is built once and kept up to date by a background thread listening to
+    WaitForUpdatesEx on a dedicated property collector, so renames, creations and deletions
+    are reflected without scanning the inventory again.
+    """
+    def __init__(self, vcenter, vimtypes=INDEXED_TYPES):
+        """
+        @param vcenter: The vCenter to index.
+        @type vcenter: I{vmpie.vcenter.VCenter}
+        @param vimtypes: The types of objects to index.
+        @type vimtypes: I{list}
+        """
+        self._vcenter = vcenter
+        self._vimtypes = list(vimtypes)
+        self._lock = Lock()
+        self._entries = {}
+        # Managed object ids by name
+        self._names = {}
+        self._version = ""
+        self._property_collector = None
+        self._view = None
+        self._listener_thread = None
+        self._running = False
+
+    def start(self):
+        """
+        Build the index and start listening for inventory changes.
+        """
+        content = self._vcenter._connection.content
+        self._property_collector = content.propertyCollector.CreatePropertyCollector()
+        self._view = content.viewManager.CreateContainerView(
+            container=content.rootFolder,
+            type=self._vimtypes,
+            recursive=True
+        )
+        self._property_collector.CreateFilter(
+            collector.create_container_filter_spec(self._view, self._vimtypes, INDEXED_PROPERTIES),
+            partialUpdates=False
+        )
+
+        # The first update contains the whole inventory, keep waiting until it is not truncated
+        update_set = self._wait_for_updates(max_wait_seconds=0)
+        while update_set is not None and update_set.truncated:
+            update_set = self._wait_for_updates(max_wait_seconds=0)
+
+        self._running = True
+        self._listener_thread = Thread(target=self._listener_worker, args=())
+        self._listener_thread.daemon = True
+        self._listener_thread.start()
+
+    def stop(self):
+        """
+        Stop listening for inventory changes. The index is no longer used for lookups once stopped.
+        """
+        self._running = False
+        with self._lock:
+            property_collector, self._property_collector = self._property_collector, None
+            view, self._view = self._view, None
+
+        try:
+            if property_collector:
+                property_collector.DestroyPropertyCollector()
+            if view:
+                view.DestroyView()
+        except Exception:
+            logging.debug("Failed releasing the name index resources.", exc_info=True)
+
+    def is_alive(self):
+        """
+        @return: Whether the index is up to date with the inventory.
+        @rtype: I{bool}
+        """
+        return self._running
+
+    def covers(self, vimtypes):
+        """
+        Check whether lookups of the given types can be answered by the index.
+        Subclasses of indexed types are covered too (ie: vim.VirtualApp by vim.ResourcePool).
+        @param vimtypes: The requested types.
+        @type vimtypes: I{list}
+        @rtype: I{bool}
+        """
+        return bool(vimtypes) and all(any(issubclass(vimtype, indexed) for indexed in self._vimtypes)
+                                      for vimtype in vimtypes)
+
+    def lookup(self, name, vimtypes, folder=None):
+        """
+        Find an object by its name.
+        @param name: The name of the object.
+        @type name: I{str}
+        @param vimtypes: The allowed types of the object, including their subclasses.
+        @type vimtypes: I{list}
+        @param folder: Only return an object that resides (recursively) in this folder.
+        @type folder: I{vim.Folder}
+        @return: The matching object or None if there is no such object.
+        @rtype: I{vim.ManagedEntity}
+        """
+        vimtypes = tuple(vimtypes)
+        with self._lock:
+            for moid in self._names.get(name, []):
+                obj = self._entries[moid].obj
+                if isinstance(obj, vimtypes) and (folder is None or self._is_descendant(moid, folder._moId)):
+                    return obj
+        return None
+
+    def get_parent(self, obj):
+        """
+        @param obj: An indexed object.
+        @type obj: I{vim.ManagedEntity}
+        @return: The parent of the object, or None if the object isn't indexed.
+        @rtype: I{vim.ManagedEntity}
+        """
+        with self._lock:
+            entry = self._entries.get(obj._moId)
+            return entry.parent if entry else None
+
+    def _is_descendant(self, moid, ancestor_moid):
+        entry = self._entries.get(moid)
+        while entry is not None and entry.parent is not None:
+            if entry.parent._moId == ancestor_moid:
+                return True
+            entry = self._entries.get(entry.parent._moId)
+        return False
+
+    def _wait_for_updates(self, max_wait_seconds):
+        options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=max_wait_seconds)
+        update_set = self._property_collector.WaitForUpdatesEx(version=self._version, options=options)
+
+        if update_set is not None:
+            self._apply(update_set)
+            self._version = update_set.version
+
+        return update_set
+
+    def _listener_worker(self):
+        while self._running:
+            try:
+                self._wait_for_updates(max_wait_seconds=consts.NAME_INDEX_WAIT_SECONDS)
+            except Exception:
+                if self._running:
+                    logging.warning("Name index stopped receiving updates, falling back to inventory scans.",
+                                    exc_info=True)
+                    self.stop()
+                self._running = False
+
+    def _apply(self, update_set):
+        with self._lock:
+            for filter_update in update_set.filterSet or []:
+                for object_update in filter_update.objectSet or []:
+                    moid = object_update.obj._moId
+                    entry = self._entries.get(moid)
+
+                    if entry is not None:
+                        self._unindex(entry)
+
+                    if object_update.kind == LEAVE_KIND:
+                        self._entries.pop(moid, None)
+                        continue
+
+                    if entry is None:
+                        entry = _Entry(object_update.obj)
+                        self._entries[moid] = entry
+
+                    for change in object_update.changeSet or []:
+                        value = None if change.op == REMOVE_OPERATION else change.val
+                        setattr(entry, change.name, value)
+
+                    self._names.setdefault(entry.name, []).append(moid)
+
+    def _unindex(self, entry):
+        moids = self._names.get(entry.name, [])
+        if entry.obj._moId in moids:
+            moids.remove(entry.obj._moId)
+        if not moids:
+            self._names.pop(entry.name, None)
@@ -0,0 +1,116 @@
+# ==================================================================================================================== #
+# File Name     : parent_cache.py
+# Purpose       : Provide a cache of the inventory hierarchy, used to compute inventory paths.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import os
+from threading import Lock
+
+from pyVmomi import vim
+
+import collector
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class ParentCache(object):
+    """
+    Cache the name and parent of inventory objects, keyed by their managed object id.
+    Inventory paths are computed from the cache instead of walking up the hierarchy with a
+    round trip per level.
+    """
+    def __init__(self, vcenter):
+        """
+        @param vcenter: The vCenter of the cached objects.
+        @type vcenter: I{vmpie.vcenter.VCenter}
+        """
+        self._vcenter = vcenter
+        self._lock = Lock()
+        self._entries = {}
+
+    def load(self):
+        """
+        Fill the cache with the name and parent of every inventory object, using a single property collector call.
+        """
+        inventory = collector.retrieve_container_properties([vim.ManagedEntity], ["name", "parent"],
+                                                            vcenter=self._vcenter)
+        with self._lock:
+            for obj, properties in inventory:
+                self._entries[obj._moId] = (properties.get("name"), properties.get("parent"))
+
+    def get(self, obj):
+        """
+        Get the name and parent of an inventory object. Objects which aren't cached are retrieved along with
+        all of their ancestors in a single call.
+        @param obj: The inventory object.
+        @type obj: I{vim.ManagedEntity}
+        @return: The name and parent of the object.
+        @rtype: I{tuple}
+        """
+        with self._lock:
+            entry = self._entries.get(obj._moId)
+        if entry is not None:
+            return entry
+
+        chain = collector.retrieve_parent_chain(obj, vcenter=self._vcenter)
+        with self._lock:
+            for chain_obj, properties in chain:
+                self._entries[chain_obj._moId] = (properties.get("name"), properties.get("parent"))
+            return self._entries[obj._moId]
+
+    def path(self, obj):
+        """
+        Compute the path of an inventory object relative to its datacenter's top level folder (ie: "folder/vm_name").
+        @param obj: The inventory object.
+        @type obj: I{vim.ManagedEntity}
+        @return: The path of the object.
+        @rtype: I{str}
+        """
+        path = []
+        name, parent = self.get(obj)
+
+        while isinstance(parent, vim.Folder):
+            path.append(name)
+            name, parent = self.get(parent)
+
+        return os.path.join(*path[::-1]) if path else ""
+
+    def invalidate(self, obj):
+        """
+        Remove an object and all of its cached descendants from the cache (ie: after a move or a rename).
+        @param obj: The inventory object.
+        @type obj: I{vim.ManagedEntity}
+        """
+        with self._lock:
+            stale = [moid for moid in self._entries if self._is_descendant(moid, obj._moId)]
+            for moid in stale + [obj._moId]:
+                self._entries.pop(moid, None)
+
+    def invalidate_after(self, task, obj):
+        """
+        Invalidate an object once a task that moves or renames it completes (See invalidate).
+        Until then, the object keeps its cached name and parent, which are still the current ones.
+        @param task: The move or rename task.
+        @type task: I{vim.Task / vmpie.task.Task}
+        @param obj: The inventory object.
+        @type obj: I{vim.ManagedEntity}
+        """
+        self._vcenter.task_waiter.add([task], lambda result: self.invalidate(obj))
+
+    def clear(self):
+        """
+        Remove all the objects from the cache.
+        """
+        with self._lock:
+            self._entries = {}
+
+    def _is_descendant(self, moid, ancestor_moid):
+        entry = self._entries.get(moid)
+        while entry is not None and entry[1] is not None:
+            if entry[1]._moId == ancestor_moid:
+                return True
+            entry = self._entries.get(entry[1]._moId)
+        return False
@@ -8,7 +8,10 @@
 from __future__ import print_function
 import sys
 import os
-from collections import Mapping
+import random
+import itertools
+from threading import Lock
+from collections import Mapping, OrderedDict
 
 os.environ["FLAME_ENABLED"] = "true"
 os.environ["PYRO_FLAME_ENABLED"] = "true"
@@ -27,6 +30,8 @@ from Pyro4.utils import flame
 
 
 SERVER_NAME = "Vmpie.Server"
+CODE_CACHE_SIZE = 1024
+REMOTE_CODE_FILENAME = "<remote-code>"
 
 VALUE_LABEL = 1
 ITERABLE_LABEL = 2
@@ -109,6 +114,50 @@ def connect(location, hmac_key=None):
 
 
 # ===================================================== CLASSES ====================================================== #
+class CodeCache(object):
+    """
+    A bounded LRU of compiled code objects, keyed by their source and compile mode.
+    Clients send the same small expressions over and over, so most calls skip compiling.
+    """
+
+    def __init__(self, max_size=CODE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._code = OrderedDict()
+
+    def compile(self, source, mode):
+        """
+        Get the compiled code of a source, compiling it on a miss.
+        @param source: The source code.
+        @param mode: The compile mode, "exec" or "eval".
+        @return: The code object.
+        """
+        key = (source, mode)
+        with self._lock:
+            code = self._code.pop(key, None)
+            if code is not None:
+                # Move the code to the end of the LRU
+                self._code[key] = code
+                self.hits += 1
+                return code
+            self.misses += 1
+
+        code = compile(source, REMOTE_CODE_FILENAME, mode)
+
+        with self._lock:
+            self._code[key] = code
+            while len(self._code) > self.max_size:
+                self._code.popitem(last=False)
+
+        return code
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._code), "max_size": self.max_size}
+
+
 @core.expose
 class Server(Flame):
     """
@@ -118,9 +167,66 @@ class Server(Flame):
     """
 
     def __init__(self):
+        # Objects referenced by clients, by their handle
         self.local_storage = {}
+        self._handles = {}
+        self._refcounts = {}
+        self._handle_counter = itertools.count(1)
+        self._storage_lock = Lock()
+        self.code_cache = CodeCache()
+        # Method tables of returned objects, described to clients by their type id.
+        # Type ids are only unique within this process, so they're sent along with the epoch of the server.
+        self.epoch = random.getrandbits(32)
+        self._type_ids = {}
+        self._type_descriptions = {}
+        self._type_id_counter = itertools.count(1)
+        self._types_lock = Lock()
         super(Server, self).__init__()
 
+    def store(self, obj):
+        """
+        Keep an object for a client and get its handle.
+        An object keeps its handle while it is stored, and every reference sent to a client counts until
+        the client releases it (See release).
+        """
+        with self._storage_lock:
+            # The id can't be reused by another object while the object is stored
+            handle = self._handles.get(id(obj))
+            if handle is None:
+                handle = next(self._handle_counter)
+                self._handles[id(obj)] = handle
+                self.local_storage[handle] = obj
+                self._refcounts[handle] = 0
+            self._refcounts[handle] += 1
+            return handle
+
+    def _remove(self, handle):
+        obj = self.local_storage.pop(handle, None)
+        self._refcounts.pop(handle, None)
+        if obj is not None:
+            self._handles.pop(id(obj), None)
+
+    def get_type_id(self, obj):
+        """
+        Get the id of the class and methods of an object.
+        The methods are inspected per object, since instances of a class may have callables of their own,
+        so objects share a type id only if they have the same class and methods.
+        """
+        cls = obj.__class__
+        description = (cls.__name__, cls.__module__, tuple(inspect_methods(obj)))
+        type_id = self._type_ids.get(description)
+        if type_id is not None:
+            return type_id
+
+        with self._types_lock:
+            type_id = self._type_ids.get(description)
+            if type_id is None:
+                type_id = next(self._type_id_counter)
+                self._type_descriptions[type_id] = description
+                self._type_ids[description] = type_id
+
+        return type_id
+
     def unpack(self, object):
         label, data = object
 
@@ -146,17 +252,15 @@ class Server(Flame):
 
     def pack(self, obj):
         """
-        Pack each argument as a tuple(type[reg/ref], value[real value/(oid, class, module, ,methods))
+        Pack each argument as a tuple(type[reg/ref], value[real value/(handle, type id, server epoch)).
+        The class and methods of a type id are sent once per client (See describe_type).
         Check if picklable or if stream (ie: file, stdout, etc), and handle  accordingly.
         Check if maybe we can implement RemoteFunction, RemoteMethod and RemoteSubmodule here and send it
         instead of defining it in vmpie.
         """
         try:
             if is_file(obj):
-                self.local_storage[id(obj)] = obj
-                return FILE_LABEL, (
-                id(obj), obj.__class__.__name__, obj.__class__.__module__,
-                inspect_methods(obj))
+                return FILE_LABEL, (self.store(obj), self.get_type_id(obj), self.epoch)
             elif isinstance(obj, Mapping):
                 for key, value in obj.items():
                     obj[key] = self.pack(value)
@@ -171,20 +275,52 @@ class Server(Flame):
             # TODO: Log errors to a log file
             pass
 
-        self.local_storage[id(obj)] = obj
-        return REF_LABEL, (
-            id(obj), obj.__class__.__name__, obj.__class__.__module__,
-            inspect_methods(obj))
+        return REF_LABEL, (self.store(obj), self.get_type_id(obj), self.epoch)
+
+    @core.expose
+    def release(self, handles):
+        """release references to stored objects, a handle appears once for every released reference"""
+        with self._storage_lock:
+            for handle in handles:
+                if handle not in self._refcounts:
+                    continue
+                self._refcounts[handle] -= 1
+                if self._refcounts[handle] <= 0:
+                    self._remove(handle)
+
+    @core.expose
+    def storage_size(self):
+        """return the number of stored objects"""
+        return self.pack(len(self.local_storage))
+
+    @core.expose
+    def evict(self, handles=None):
+        """remove stored objects regardless of their references, or all of them if no handles are given"""
+        with self._storage_lock:
+            for handle in (list(self.local_storage) if handles is None else handles):
+                self._remove(handle)
+
+    @core.expose
+    def describe_type(self, type_id):
+        """return the class name, module name and methods of a type id sent by pack"""
+        return self._type_descriptions[type_id]
 
     @core.expose
     def execute(self, code):
         """execute a piece of code"""
-        return self.pack(super(Server, self).execute(code))
+        # Runs in the globals of the flame module, like Flame.execute
+        exec(self.code_cache.compile(flame.fixExecSourceNewlines(code), "exec"), flame.__dict__)
+        return self.pack(None)
 
     @core.expose
     def evaluate(self, expression):
         """evaluate an expression and return its result"""
-        return self.pack(super(Server, self).evaluate(expression))
+        return self.pack(eval(self.code_cache.compile(expression.strip(), "eval"), flame.__dict__))
+
+    @core.expose
+    def code_cache_stats(self):
+        """return the hits, misses and size of the compiled code cache"""
+        return self.pack(self.code_cache.stats())
 
     @core.expose
     def invokeBuiltin(self, builtin, args, kwargs):
@@ -0,0 +1,106 @@
+# ==================================================================================================================== #
+# File Name     : session_cache.py
+# Purpose       : Persist vCenter session cookies to reuse them across processes.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import os
+import ssl
+import hashlib
+import logging
+
+from pyVmomi import vim
+from pyVim.connect import SmartStubAdapter, SetSi
+
+import consts
+
+# ==================================================== FUNCTIONS ===================================================== #
+
+
+def _get_cache_path(host, user):
+    key = hashlib.sha1("{user}@{host}".format(user=user, host=host)).hexdigest()
+    return os.path.join(consts.SESSION_CACHE_FOLDER, key)
+
+
+def save(host, user, cookie):
+    """
+    Save the session cookie of a user. The file is only readable by the current user.
+    @param host: The address of the vCenter.
+    @type host: I{str}
+    @param user: The user name.
+    @type user: I{str}
+    @param cookie: The session cookie.
+    @type cookie: I{str}
+    """
+    if not os.path.isdir(consts.SESSION_CACHE_FOLDER):
+        os.makedirs(consts.SESSION_CACHE_FOLDER, 0700)
+
+    fd = os.open(_get_cache_path(host, user), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+    with os.fdopen(fd, "w") as cache_file:
+        cache_file.write(cookie)
+
+
+def load(host, user):
+    """
+    Load the saved session cookie of a user.
+    @return: The session cookie, or None if there isn't one.
+    @rtype: I{str}
+    """
+    try:
+        with open(_get_cache_path(host, user)) as cache_file:
+            return cache_file.read() or None
+    except IOError:
+        return None
+
+
+def remove(host, user):
+    """
+    Remove the saved session cookie of a user.
+    """
+    try:
+        os.remove(_get_cache_path(host, user))
+    except OSError:
+        pass
+
+
+def _create_stub(host):
+    try:
+        return SmartStubAdapter(host=host)
+    except (vim.fault.HostConnectFault, ssl.SSLError) as exc:
+        if '[SSL: CERTIFICATE_VERIFY_FAILED' in str(exc):
+            return SmartStubAdapter(host=host, sslContext=ssl._create_unverified_context())
+        raise
+
+
+def restore(host, user):
+    """
+    Reuse the saved session of a user, if it's still valid.
+    Validating the session costs a single call, compared to the several calls of a full login.
+    @param host: The address of the vCenter.
+    @type host: I{str}
+    @param user: The user name.
+    @type user: I{str}
+    @return: The service instance of the restored session, or None if there's no valid saved session.
+    @rtype: I{vim.ServiceInstance}
+    """
+    cookie = load(host, user)
+    if cookie is None:
+        return None
+
+    try:
+        stub = _create_stub(host)
+        stub.cookie = cookie
+
+        if vim.SessionManager("SessionManager", stub).currentSession:
+            connection = vim.ServiceInstance("ServiceInstance", stub)
+            # Same as SmartConnect does
+            SetSi(connection)
+            return connection
+
+    except Exception:
+        logging.debug("Cannot restore the saved session.", exc_info=True)
+
+    remove(host, user)
+    return None
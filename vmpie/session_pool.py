@@ -0,0 +1,244 @@
+# ==================================================================================================================== #
+# File Name     : session_pool.py
+# Purpose       : Provide a pool of authenticated vCenter sessions for parallel operations.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import time
+import Queue
+import logging
+from threading import Lock
+
+from pyVmomi import vim
+
+import consts
+import vmpie_exceptions
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class Session(object):
+    """
+    An authenticated vCenter session with its own SOAP stub.
+    """
+    def __init__(self, connection, pool):
+        """
+        @param connection: The service instance of the session.
+        @type connection: I{vim.ServiceInstance}
+        @param pool: The pool the session belongs to.
+        @type pool: I{SessionPool}
+        """
+        self._connection = connection
+        self._pool = pool
+        self.last_used = time.time()
+        self.closed = False
+
+    @property
+    def content(self):
+        return self._connection.content
+
+    def bind(self, obj):
+        """
+        Bind a pyVmomi object to this session, so its calls are sent through the session's stub.
+        @param obj: A pyVmomi managed object.
+        @type obj: I{vim.ManagedObject}
+        @return: The same managed object, bound to this session.
+        @rtype: I{vim.ManagedObject}
+        """
+        return obj.__class__(obj._moId, stub=self._connection._stub)
+
+    def ping(self):
+        return self._connection.CurrentTime()
+
+    def close(self):
+        try:
+            # Not using pyVim's Disconnect, which also resets the global service instance
+            self._connection.content.sessionManager.Logout()
+        except Exception:
+            logging.debug("Failed closing a pooled session.", exc_info=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and issubclass(exc_type, vim.fault.NotAuthenticated):
+            # The session has expired, don't hand it to the next operation
+            self._pool.discard(self)
+        else:
+            self._pool.checkin(self)
+
+
+class SessionPool(object):
+    """
+    A bounded pool of authenticated vCenter sessions.
+    Sessions are opened on demand, up to the size of the pool, and reused by the following operations.
+    Idle sessions are kept alive by keep_alive(), and closed once they're idle for too long.
+    Once the pool is closed, the sessions that are still checked out are closed when they're returned.
+    """
+    def __init__(self, login, size=consts.SESSION_POOL_SIZE, idle_timeout=consts.SESSION_POOL_IDLE_TIMEOUT):
+        """
+        @param login: A callable that opens a new session and returns its service instance.
+        @type login: I{callable}
+        @param size: The maximum number of sessions.
+        @type size: I{int}
+        @param idle_timeout: The number of seconds after which an unused session is closed.
+        @type idle_timeout: I{int}
+        """
+        self._login = login
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._idle = Queue.LifoQueue()
+        self._lock = Lock()
+        self._opened = 0
+        self._checked_out = set()
+        self._closed = False
+
+    def checkout(self, timeout=None):
+        """
+        Take a session from the pool, opening a new one if all the sessions are busy and the pool isn't full.
+        @param timeout: The maximum number of seconds to wait for a free session. None waits forever.
+        @type timeout: I{float}
+        @return: The session.
+        @rtype: I{Session}
+        @raise vmpie_exceptions.NotConnectedException: If the pool is closed, a session can't be opened,
+                                                       or the timeout has passed.
+        """
+        if self._closed:
+            raise vmpie_exceptions.NotConnectedException
+
+        try:
+            return self._track(self._idle.get_nowait())
+        except Queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self._size
+            if can_open:
+                self._opened += 1
+
+        if can_open:
+            try:
+                connection = self._login()
+            except Exception:
+                connection = None
+
+            if connection is None:
+                with self._lock:
+                    self._opened -= 1
+                raise vmpie_exceptions.NotConnectedException
+
+            return self._track(Session(connection, self))
+
+        try:
+            return self._track(self._idle.get(timeout=timeout))
+        except Queue.Empty:
+            raise vmpie_exceptions.NotConnectedException
+
+    def checkin(self, session):
+        """
+        Return a session to the pool.
+        @param session: The session.
+        @type session: I{Session}
+        """
+        with self._lock:
+            self._checked_out.discard(session)
+            closed = self._closed
+
+        if closed:
+            self.discard(session)
+            return
+
+        session.last_used = time.time()
+        self._idle.put(session)
+
+    def session(self, timeout=None):
+        """
+        Check out a session, to be used as a context manager which returns it to the pool.
+        @param timeout: The maximum number of seconds to wait for a free session. None waits forever.
+        @type timeout: I{float}
+        @rtype: I{Session}
+        """
+        return self.checkout(timeout=timeout)
+
+    def keep_alive(self):
+        """
+        Ping the idle sessions so they won't expire, and close the sessions that were idle for too long.
+        """
+        sessions = self._drain()
+
+        for session in sessions:
+            if time.time() - session.last_used > self._idle_timeout:
+                self.discard(session)
+                continue
+
+            try:
+                session.ping()
+            except Exception:
+                self.discard(session)
+                continue
+
+            self._idle.put(session)
+
+    def discard_idle(self):
+        """
+        Close all the idle sessions (ie: once the sessions have expired). New sessions are opened on demand.
+        """
+        for session in self._drain():
+            self.discard(session)
+
+    def close(self):
+        """
+        Close all the idle sessions, and the checked out sessions once they're returned.
+        """
+        with self._lock:
+            self._closed = True
+
+        self.discard_idle()
+
+    def close_all(self):
+        """
+        Close all the sessions, including the checked out ones (ie: at exit, when they'll never be returned).
+        """
+        self.close()
+        with self._lock:
+            sessions, self._checked_out = list(self._checked_out), set()
+
+        for session in sessions:
+            self.discard(session)
+
+    def _track(self, session):
+        with self._lock:
+            self._checked_out.add(session)
+            closed = self._closed
+
+        if closed:
+            # The pool was closed while the session was being checked out
+            self.discard(session)
+            raise vmpie_exceptions.NotConnectedException
+
+        return session
+
+    def _drain(self):
+        sessions = []
+        while True:
+            try:
+                sessions.append(self._idle.get_nowait())
+            except Queue.Empty:
+                return sessions
+
+    def discard(self, session):
+        """
+        Close a checked out session instead of returning it to the pool. Closing a session twice does nothing.
+        @param session: The session.
+        @type session: I{Session}
+        """
+        with self._lock:
+            self._checked_out.discard(session)
+            if session.closed:
+                return
+            session.closed = True
+            self._opened -= 1
+
+        session.close()
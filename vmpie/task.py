@@ -1,40 +1,109 @@
 import consts
 import time
+import utils
+import collector
+from pyVmomi import vim
 from pyvmomi_tools import cli
 
 
 class Task(object):
-
-    def __init__(self, _pyVmomiTask=None):
+    """
+    A vCenter task.
+    The properties are served from a snapshot of the task's info, which is fetched once and
+    updated by refresh(). Use Task.load to fetch the info of many tasks in a single call.
+    """
+    def __init__(self, _pyVmomiTask=None, _info=None):
         self._pyVmomiTask = _pyVmomiTask
-        self.created_at = self._pyVmomiTask.info.queueTime
-        self.started_at = self._pyVmomiTask.info.startTime
+        self._info = _info
+
+    @classmethod
+    def load(cls, tasks, vcenter=None):
+        """
+        Fetch the info of many tasks in a single property collector call.
+        @param tasks: The tasks. Given vmpie tasks are refreshed in place.
+        @type tasks: I{list of vim.Task / Task}
+        @param vcenter: The vCenter of the tasks. Defaults to the connected vCenter.
+        @type vcenter: I{vmpie.vcenter.VCenter}
+        @return: The tasks, in the given order.
+        @rtype: I{list of Task}
+        """
+        tasks = [task if isinstance(task, Task) else cls(task) for task in tasks]
+        infos = collector.retrieve_objects_properties([task._pyVmomiTask for task in tasks], vim.Task, ["info"],
+                                                      vcenter=vcenter)
+        for task in tasks:
+            task._info = infos.get(task._pyVmomiTask._moId, {}).get("info")
+
+        return tasks
+
+    def refresh(self):
+        """
+        Fetch the current info of the task.
+        """
+        self._info = self._pyVmomiTask.info
+
+    @property
+    def info(self):
+        if self._info is None:
+            self.refresh()
+        return self._info
 
     @property
     def state(self):
-        return self._pyVmomiTask.state.lower()
+        return self.info.state.lower()
 
     @property
     def name(self):
-        return self._pyVmomiTask.name
+        return self.info.name or self.info.descriptionId
+
+    @property
+    def progress(self):
+        """
+        The progress of the task in percents, or None if the task doesn't report progress.
+        """
+        if self.state == consts.SUCCESS_STATE:
+            return 100
+        return self.info.progress
 
     @property
     def is_alive(self):
-        return self._pyVmomiTask.is_alive
+        return self.info.state in (vim.TaskInfo.State.queued, vim.TaskInfo.State.running)
+
+    @property
+    def created_at(self):
+        return self.info.queueTime
+
+    @property
+    def started_at(self):
+        return self.info.startTime
 
     @property
     def completed_at(self):
-        return self._pyVmomiTask.info.completeTime or None
+        return self.info.completeTime or None
+
+    @property
+    def owner(self):
+        reason = self.info.reason
+        return getattr(reason, "userName", None) or None
+
+    # Kept for backwards compatibility
+    onwer = owner
+
+    @property
+    def result(self):
+        return self.info.result
 
     @property
-    def onwer(self):
-        return self._pyVmomiTask.info.result.userName or None
+    def error(self):
+        return self.info.error
 
     def is_success(self):
         return self.state == consts.SUCCESS_STATE
 
     def wait(self, spinner=False):
-        self._pyVmomiTask.wait()
+        try:
+            return utils.wait_for_task(self)
+        finally:
+            self.refresh()
 
     def wait_with_spinner(self, condition, argument, msg):
         while condition(argument):
@@ -0,0 +1,338 @@
+# ==================================================================================================================== #
+# File Name     : task_feed.py
+# Purpose       : Provide a live feed of the vCenter's task events.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import Queue
+import logging
+from threading import Thread, Lock
+
+from pyVmomi import vim
+from pyVmomi import vmodl
+
+import consts
+import task
+
+# ==================================================== CONSTANTS ===================================================== #
+
+QUEUED = "queued"
+RUNNING = "running"
+PROGRESS = "progress"
+SUCCESS = "success"
+ERROR = "error"
+EVENT_KINDS = [QUEUED, RUNNING, PROGRESS, SUCCESS, ERROR]
+
+RECENT_TASKS_TRAVERSAL_NAME = "recentTasks"
+LEAVE_KIND = "leave"
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class TaskEvent(object):
+    """
+    A change in a vCenter task.
+    """
+    __slots__ = ["kind", "task"]
+
+    def __init__(self, kind, task):
+        """
+        @param kind: The kind of the event, one of EVENT_KINDS.
+        @type kind: I{str}
+        @param task: The task, with a snapshot of its info at the time of the event.
+        @type task: I{vmpie.task.Task}
+        """
+        self.kind = kind
+        self.task = task
+
+    def __str__(self):
+        return '<TaskEvent: {kind}, {task}>'.format(kind=self.kind, task=self.task)
+
+    def __repr__(self):
+        return '<TaskEvent: {kind}, {task}>'.format(kind=self.kind, task=self.task)
+
+
+class Subscription(object):
+    """
+    A consumer of the task feed. Iterate over it to receive its events, ie:
+        for event in vcenter.task_feed(kinds=[task_feed.ERROR]):
+            print event.task.name, event.task.error
+    """
+    _CLOSED = object()
+
+    def __init__(self, feed, kinds=None, predicate=None):
+        self._feed = feed
+        self._kinds = frozenset(kinds) if kinds is not None else None
+        self._predicate = predicate
+        self._events = Queue.Queue()
+        self.closed = False
+
+    def matches(self, event):
+        if self._kinds is not None and event.kind not in self._kinds:
+            return False
+        return self._predicate is None or self._predicate(event)
+
+    def put(self, event):
+        self._events.put(event)
+
+    def get(self, timeout=None):
+        """
+        Wait for the next event.
+        @param timeout: The maximum number of seconds to wait. None waits forever.
+        @type timeout: I{float}
+        @return: The next event, or None if the subscription is closed or the timeout has passed.
+        @rtype: I{TaskEvent}
+        """
+        if self.closed and self._events.empty():
+            return None
+
+        try:
+            event = self._events.get(timeout=timeout)
+        except Queue.Empty:
+            return None
+
+        return None if event is self._CLOSED else event
+
+    def close(self):
+        """
+        Stop receiving events.
+        """
+        if not self.closed:
+            self.closed = True
+            self._feed.unsubscribe(self)
+            self._events.put(self._CLOSED)
+
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TaskFeed(object):
+    """
+    Watch the recent tasks of the vCenter and dispatch their changes to subscriptions.
+    A single property filter on the task manager's recent tasks is shared by all the subscriptions,
+    and a background thread blocks in WaitForUpdatesEx, so tasks are never polled.
+    """
+    def __init__(self, vcenter):
+        """
+        @param vcenter: The vCenter to watch.
+        @type vcenter: I{vmpie.vcenter.VCenter}
+        """
+        self._vcenter = vcenter
+        self._lock = Lock()
+        self._subscriptions = []
+        self._property_collector = None
+        self._listener_thread = None
+        self._running = False
+        # Changed on every start and stop, so a listener of a previous start never touches the feed
+        self._generation = 0
+
+    def subscribe(self, kinds=None, predicate=None):
+        """
+        Start receiving task events. The feed is started with the first subscription.
+        @param kinds: The kinds of events to receive (See EVENT_KINDS). Defaults to all kinds.
+        @type kinds: I{list}
+        @param predicate: A function receiving an event, which returns whether to receive it.
+        @type predicate: I{callable}
+        @rtype: I{Subscription}
+        """
+        subscription = Subscription(self, kinds=kinds, predicate=predicate)
+        with self._lock:
+            self._subscriptions.append(subscription)
+
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Stop dispatching events to a subscription. The feed is stopped with the last subscription.
+        @param subscription: The subscription.
+        @type subscription: I{Subscription}
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            remaining = len(self._subscriptions)
+
+        if not remaining:
+            self.stop()
+
+    def start(self):
+        """
+        Create the recent tasks filter and start dispatching events. Does nothing if the feed is running.
+        """
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._generation += 1
+            generation = self._generation
+
+        property_collector = None
+        try:
+            property_collector = self._create_property_collector()
+            # The first update describes the tasks that already exist, only their later changes are events
+            states = {}
+            version, _, truncated = self._wait_for_updates(property_collector, "", states, max_wait_seconds=0)
+            # Many recent tasks may not fit in a single update, keep waiting until it is not truncated
+            while truncated:
+                version, _, truncated = self._wait_for_updates(property_collector, version, states,
+                                                               max_wait_seconds=0)
+        except Exception:
+            with self._lock:
+                if self._generation == generation:
+                    self._running = False
+            self._destroy(property_collector)
+            raise
+
+        with self._lock:
+            # The feed may have been stopped, or stopped and started again, while it was starting
+            current = self._generation == generation
+            if current:
+                self._property_collector = property_collector
+                self._listener_thread = Thread(target=self._listener_worker,
+                                               args=(generation, property_collector, version, states))
+                self._listener_thread.daemon = True
+                self._listener_thread.start()
+
+        if not current:
+            self._destroy(property_collector)
+
+    def stop(self):
+        """
+        Stop dispatching events and close all the subscriptions.
+        """
+        with self._lock:
+            self._running = False
+            self._generation += 1
+            property_collector, self._property_collector = self._property_collector, None
+            subscriptions, self._subscriptions = self._subscriptions, []
+
+        self._destroy(property_collector)
+        for subscription in subscriptions:
+            subscription.close()
+
+    def is_alive(self):
+        return self._running
+
+    def _listener_worker(self, generation, property_collector, version, states):
+        while self._generation == generation:
+            try:
+                version, events, _ = self._wait_for_updates(property_collector, version, states,
+                                                            max_wait_seconds=consts.TASK_WAITER_MAX_WAIT)
+            except Exception:
+                with self._lock:
+                    current = self._generation == generation
+                if current:
+                    logging.warning("Task feed stopped receiving updates.", exc_info=True)
+                    self.stop()
+                return
+
+            if self._generation == generation:
+                for event in events:
+                    self._dispatch(event)
+
+    def _create_property_collector(self):
+        content = self._vcenter._connection.content
+        property_collector = content.propertyCollector.CreatePropertyCollector()
+
+        recent_tasks_traversal = vmodl.query.PropertyCollector.TraversalSpec(
+            name=RECENT_TASKS_TRAVERSAL_NAME,
+            type=vim.TaskManager,
+            path="recentTask",
+            skip=False
+        )
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=content.taskManager, skip=True,
+                                                                selectSet=[recent_tasks_traversal])],
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=vim.Task, pathSet=["info"])]
+        )
+        property_collector.CreateFilter(filter_spec, partialUpdates=False)
+        return property_collector
+
+    def _destroy(self, property_collector):
+        if property_collector is None:
+            return
+
+        try:
+            property_collector.DestroyPropertyCollector()
+        except Exception:
+            logging.debug("Failed destroying the task feed's property collector.", exc_info=True)
+
+    def _wait_for_updates(self, property_collector, version, states, max_wait_seconds):
+        """
+        Wait for a single round of updates.
+        @param states: The last seen (state, progress) of every recent task, by managed object id.
+                       Updated in place.
+        @type states: I{dict}
+        @return: The new version of the updates, the events of the round and whether the updates were truncated.
+        @rtype: I{tuple}
+        """
+        options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=max_wait_seconds)
+        update_set = property_collector.WaitForUpdatesEx(version=version, options=options)
+
+        if update_set is None:
+            return version, [], False
+
+        events = []
+        for filter_update in update_set.filterSet or []:
+            for object_update in filter_update.objectSet or []:
+                event = self._apply(object_update, states)
+                if event is not None:
+                    events.append(event)
+
+        return update_set.version, events, bool(update_set.truncated)
+
+    def _apply(self, object_update, states):
+        """
+        Update the last seen state of a task.
+        @return: The event of the change, or None if nothing interesting has changed.
+        @rtype: I{TaskEvent}
+        """
+        moid = object_update.obj._moId
+
+        if object_update.kind == LEAVE_KIND:
+            states.pop(moid, None)
+            return None
+
+        info = None
+        for change in object_update.changeSet or []:
+            if change.name == "info":
+                info = change.val
+
+        if info is None:
+            return None
+
+        previous = states.get(moid)
+        states[moid] = (info.state, info.progress)
+
+        if previous is None or previous[0] != info.state:
+            kind = info.state
+        elif info.state == vim.TaskInfo.State.running and previous[1] != info.progress:
+            kind = PROGRESS
+        else:
+            return None
+
+        return TaskEvent(kind, task.Task(object_update.obj, _info=info))
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            try:
+                if subscription.matches(event):
+                    subscription.put(event)
+            except Exception:
+                logging.error("Task feed predicate failed.", exc_info=True)
@@ -0,0 +1,305 @@
+# ==================================================================================================================== #
+# File Name     : task_waiter.py
+# Purpose       : Wait for many vCenter tasks at once using property collector updates.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import time
+import logging
+from threading import Thread, Lock
+
+from pyVmomi import vim
+from pyVmomi import vmodl
+
+import consts
+import utils
+import vmpie_exceptions
+
+# ==================================================== CONSTANTS ===================================================== #
+
+TASK_PROPERTIES = ["info.state", "info.result", "info.error"]
+COMPLETED_STATES = frozenset([vim.TaskInfo.State.success, vim.TaskInfo.State.error])
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class TaskResult(object):
+    """
+    The outcome of a completed task.
+    """
+    __slots__ = ["task", "state", "result", "error"]
+
+    def __init__(self, task):
+        self.task = task
+        self.state = None
+        self.result = None
+        self.error = None
+
+    @property
+    def is_success(self):
+        return self.state == vim.TaskInfo.State.success
+
+    def __str__(self):
+        return '<TaskResult: {task}, {state}>'.format(task=self.task._moId, state=self.state)
+
+    def __repr__(self):
+        return '<TaskResult: {task}, {state}>'.format(task=self.task._moId, state=self.state)
+
+
+class TaskWaiter(object):
+    """
+    Wait for many tasks using a single property collector.
+    The waiter blocks in WaitForUpdatesEx and only wakes up when the state of a task changes,
+    instead of polling each task.
+    Tasks can be waited for synchronously (See wait), or tracked by a background thread which
+    calls a callback once each task completes (See start).
+    """
+    def __init__(self, vcenter=None, max_wait_seconds=consts.TASK_WAITER_MAX_WAIT):
+        """
+        @param vcenter: The vCenter of the tasks. Defaults to the connected vCenter.
+        @type vcenter: I{vmpie.vcenter.VCenter}
+        @param max_wait_seconds: The maximum number of seconds to block in a single WaitForUpdatesEx call.
+        @type max_wait_seconds: I{int}
+        """
+        self._vcenter = vcenter or utils.get_vcenter()
+        self._max_wait_seconds = max_wait_seconds
+        self._lock = Lock()
+        self._property_collector = None
+        self._version = ""
+        # Tracked tasks, by managed object id
+        self._pending = {}
+        self._callbacks = {}
+        self._filters = {}
+        self._results = {}
+        self._listener_thread = None
+        self._running = False
+
+    def add(self, tasks, callback=None):
+        """
+        Start tracking tasks. All the given tasks are registered in a single property filter.
+        @param tasks: The tasks to track.
+        @type tasks: I{list of vim.Task / vmpie.task.Task}
+        @param callback: A function called with the I{TaskResult} of each task once it completes.
+        @type callback: I{callable}
+        """
+        tasks = [getattr(task, "_pyVmomiTask", task) for task in tasks]
+        completed = []
+        new_tasks = []
+
+        with self._lock:
+            for task in tasks:
+                if task._moId in self._results:
+                    completed.append(self._results[task._moId])
+                    continue
+
+                if callback is not None:
+                    self._callbacks.setdefault(task._moId, []).append(callback)
+
+                if task._moId not in self._pending:
+                    self._pending[task._moId] = TaskResult(task)
+                    new_tasks.append(task)
+
+        if callback is not None:
+            for result in completed:
+                self._call(callback, result)
+
+        tasks = new_tasks
+        if not tasks:
+            return
+
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=task, skip=False) for task in tasks],
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=vim.Task, pathSet=TASK_PROPERTIES)]
+        )
+        property_filter = self._get_property_collector().CreateFilter(filter_spec, partialUpdates=False)
+
+        with self._lock:
+            # The background thread may have completed some of the tasks already
+            moids = set(task._moId for task in tasks if task._moId in self._pending)
+            if moids:
+                self._filters[property_filter] = moids
+            else:
+                property_filter.Destroy()
+
+    def add_future(self, task):
+        """
+        Start tracking a task, and get a future of its result.
+        The future is resolved once the task completes, so the waiter should be running (See start).
+        Requires the futures backport on Python 2 (pip install vmpie[futures]).
+        @param task: The task.
+        @type task: I{vim.Task / vmpie.task.Task}
+        @return: A future of the result of the task, which raises the error of the task if it failed,
+                 or a TaskWaiterStoppedException if the waiter stopped before the task completed.
+        @rtype: I{concurrent.futures.Future}
+        """
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def set_result(result):
+            if result.error is not None:
+                future.set_exception(result.error)
+            else:
+                future.set_result(result.result)
+
+        self.add([task], set_result)
+        return future
+
+    def wait(self, tasks=None, timeout=None):
+        """
+        Block until tasks complete.
+        @param tasks: The tasks to wait for. They're tracked if they weren't before. Defaults to all tracked tasks.
+        @type tasks: I{list of vim.Task / vmpie.task.Task}
+        @param timeout: The maximum number of seconds to wait. None waits until all the tasks complete.
+        @type timeout: I{float}
+        @return: The results of the tasks that completed, by the managed object id of the task.
+        @rtype: I{dict}
+        """
+        if tasks is not None:
+            self.add(tasks)
+            moids = set(getattr(task, "_pyVmomiTask", task)._moId for task in tasks)
+        else:
+            moids = set(self._pending) | set(self._results)
+
+        deadline = None if timeout is None else time.time() + timeout
+
+        while moids & set(self._pending):
+            max_wait_seconds = self._max_wait_seconds
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                max_wait_seconds = int(min(max_wait_seconds, max(remaining, 1)))
+
+            self.poll(max_wait_seconds)
+
+        return dict((moid, self._results[moid]) for moid in moids if moid in self._results)
+
+    def poll(self, max_wait_seconds=0):
+        """
+        Wait for a single round of updates and handle them.
+        @param max_wait_seconds: The maximum number of seconds to block.
+        @type max_wait_seconds: I{int}
+        @return: The results of the tasks that completed in this round.
+        @rtype: I{list}
+        """
+        options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=max_wait_seconds)
+        update_set = self._get_property_collector().WaitForUpdatesEx(version=self._version, options=options)
+
+        if update_set is None:
+            return []
+
+        self._version = update_set.version
+        completed = []
+
+        for filter_update in update_set.filterSet or []:
+            for object_update in filter_update.objectSet or []:
+                result = self._pending.get(object_update.obj._moId)
+                if result is None:
+                    continue
+
+                for change in object_update.changeSet or []:
+                    setattr(result, change.name.split(".")[-1], change.val)
+
+                if result.state in COMPLETED_STATES:
+                    completed.append(self._complete(result, filter_update.filter))
+
+        for result in completed:
+            for callback in self._callbacks.pop(result.task._moId, []):
+                self._call(callback, result)
+
+        return completed
+
+    def pop_result(self, task):
+        """
+        Stop keeping the result of a completed task.
+        @param task: The task.
+        @type task: I{vim.Task / vmpie.task.Task}
+        @return: The result of the task, or None if it didn't complete.
+        @rtype: I{TaskResult}
+        """
+        return self._results.pop(getattr(task, "_pyVmomiTask", task)._moId, None)
+
+    def start(self):
+        """
+        Track the tasks in a background thread, which calls the callbacks of the tasks as they complete.
+        """
+        self._running = True
+        self._listener_thread = Thread(target=self._listener_worker, args=())
+        self._listener_thread.daemon = True
+        self._listener_thread.start()
+
+    def close(self, error=None):
+        """
+        Stop tracking tasks and release the property collector.
+        The callbacks of the tasks that didn't complete are called with a result whose error is a
+        TaskWaiterStoppedException, so no future is left unresolved.
+        @param error: The error to give the tasks that didn't complete.
+        @type error: I{vmpie_exceptions.TaskWaiterStoppedException}
+        """
+        self._running = False
+        with self._lock:
+            property_collector, self._property_collector = self._property_collector, None
+            pending, self._pending = self._pending, {}
+            callbacks, self._callbacks = self._callbacks, {}
+            self._filters = {}
+
+        if property_collector is not None:
+            try:
+                property_collector.DestroyPropertyCollector()
+            except Exception:
+                logging.debug("Failed destroying the task waiter's property collector.", exc_info=True)
+
+        error = error or vmpie_exceptions.TaskWaiterStoppedException()
+        for moid, result in pending.iteritems():
+            result.error = error
+            for callback in callbacks.get(moid, []):
+                self._call(callback, result)
+
+    def is_alive(self):
+        return self._running
+
+    def _listener_worker(self):
+        while self._running:
+            try:
+                self.poll(self._max_wait_seconds)
+            except Exception as exc:
+                if self._running:
+                    logging.warning("Task waiter stopped receiving updates.", exc_info=True)
+                    self.close(vmpie_exceptions.TaskWaiterStoppedException(reason=exc))
+                self._running = False
+
+    def _call(self, callback, result):
+        try:
+            callback(result)
+        except Exception:
+            logging.error("Task callback failed.", exc_info=True)
+
+    def _complete(self, result, property_filter):
+        moid = result.task._moId
+
+        with self._lock:
+            self._pending.pop(moid, None)
+            # Results of tasks with a callback are handed to the callback instead of being kept
+            if moid not in self._callbacks:
+                self._results[moid] = result
+
+            moids = self._filters.get(property_filter)
+            if moids is not None:
+                moids.discard(moid)
+                if not moids:
+                    del self._filters[property_filter]
+                    property_filter.Destroy()
+
+        return result
+
+    def _get_property_collector(self):
+        # Both the listener and add() may be the first to need the collector
+        with self._lock:
+            if self._property_collector is None:
+                content = self._vcenter._connection.content
+                self._property_collector = content.propertyCollector.CreatePropertyCollector()
+            return self._property_collector
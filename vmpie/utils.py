@@ -5,6 +5,8 @@ import logging
 
 import folder
 import vcenter
+import collector
+import task_waiter
 import consts
 import vmpie_exceptions
 
@@ -20,13 +22,28 @@ def update_stub(object):
     object._stub.cookie = vcenter._connection._stub.cookie
 
 
-def get_obj_by_name(name=None, vimtypes=[], folder=None):
+def get_obj_by_name(name=None, vimtypes=[], folder=None, vcenter=None):
     obj = None
-    vcenter = get_vcenter()
-
-    if folder is not None:
-        folder = get_obj_by_name(folder, [vim.Folder])
-    else:
+    vcenter = vcenter or get_vcenter()
+
+    if isinstance(folder, basestring):
+        folder = get_obj_by_name(folder, [vim.Folder], vcenter=vcenter)
+
+    # Answer from the live name index when possible, instead of scanning the inventory
+    if name is not None:
+        index = vcenter.name_index
+        if index is not None and index.covers(vimtypes):
+            obj = index.lookup(name, vimtypes, folder=folder)
+            if obj is not None:
+                return obj
+
+            # The index is updated asynchronously, so an object created or renamed a moment ago may be missing
+            found, _ = _get_inventory_by_names([name], vimtypes, ["name"], folder=folder, vcenter=vcenter)
+            if name not in found:
+                raise vmpie_exceptions.ObjectNotFoundException
+            return found[name][0]
+
+    if folder is None:
         folder = vcenter._connection.content.rootFolder
 
     container = vcenter._connection.content.viewManager.CreateContainerView(
@@ -50,6 +67,95 @@ def get_obj_by_name(name=None, vimtypes=[], folder=None):
     return obj
 
 
+def _get_inventory_by_names(names, vimtypes, path_set, folder=None, vcenter=None):
+    """
+    Match many names against the inventory using a single property collector call.
+    @return: A dictionary of name to (pyVmomi object, properties dictionary) and a list of the missing names.
+    @rtype: I{tuple}
+    """
+    vcenter = vcenter or get_vcenter()
+    # The property collector returns nothing for an empty list of types, unlike a container view
+    vimtypes = vimtypes or [vim.ManagedEntity]
+    path_set = list(path_set)
+    if "name" not in path_set:
+        path_set.append("name")
+
+    if isinstance(folder, basestring):
+        folder = get_obj_by_name(folder, [vim.Folder], vcenter=vcenter)
+
+    wanted = set(names)
+    found = {}
+
+    for obj, properties in collector.retrieve_container_properties(vimtypes, path_set, container=folder,
+                                                                   vcenter=vcenter):
+        name = properties.get("name")
+        # The first match wins, same as get_obj_by_name
+        if name in wanted and name not in found:
+            found[name] = (obj, properties)
+
+    missing = []
+    for name in names:
+        if name not in found and name not in missing:
+            missing.append(name)
+
+    return found, missing
+
+
+def get_objects_by_names(names, vimtypes=[], folder=None, vcenter=None):
+    """
+    Find many objects by their names using a single property collector call.
+    @param names: The names of the objects.
+    @type names: I{list}
+    @param vimtypes: The allowed types of the objects. Defaults to all inventory objects.
+    @type vimtypes: I{list}
+    @param folder: The folder (or its name) to search in recursively. Defaults to the root folder.
+    @type folder: I{vim.Folder}
+    @param vcenter: The vCenter to search in. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: A dictionary of name to pyVmomi object, and a list of the names that were not found.
+    @rtype: I{tuple}
+    """
+    found, missing = _get_inventory_by_names(names, vimtypes, ["name"], folder=folder, vcenter=vcenter)
+    return dict((name, obj) for name, (obj, _) in found.iteritems()), missing
+
+
+def find_vm(uuid=None, ip=None, dns_name=None, inventory_path=None, instance_uuid=False, vcenter=None):
+    """
+    Find a virtual machine using the vCenter search index, which costs a single round trip
+    regardless of the inventory size. Exactly one search criteria should be given.
+    @param uuid: The BIOS UUID (or instance UUID) of the virtual machine.
+    @type uuid: I{str}
+    @param ip: The IP address of the guest.
+    @type ip: I{str}
+    @param dns_name: The DNS name of the guest.
+    @type dns_name: I{str}
+    @param inventory_path: The inventory path of the virtual machine (ie: "dc/vm/folder/vm_name").
+    @type inventory_path: I{str}
+    @param instance_uuid: Whether the given uuid is the vCenter instance UUID rather than the BIOS UUID.
+    @type instance_uuid: I{bool}
+    @return: The virtual machine.
+    @rtype: I{vim.VirtualMachine}
+    """
+    vcenter = vcenter or get_vcenter()
+    search_index = vcenter._connection.content.searchIndex
+
+    if uuid:
+        obj = search_index.FindByUuid(datacenter=None, uuid=uuid, vmSearch=True, instanceUuid=instance_uuid)
+    elif ip:
+        obj = search_index.FindByIp(datacenter=None, ip=ip, vmSearch=True)
+    elif dns_name:
+        obj = search_index.FindByDnsName(datacenter=None, dnsName=dns_name, vmSearch=True)
+    elif inventory_path:
+        obj = search_index.FindByInventoryPath(inventoryPath=inventory_path)
+    else:
+        raise ValueError("A search criteria must be specified.")
+
+    if not isinstance(obj, vim.VirtualMachine):
+        raise vmpie_exceptions.ObjectNotFoundException
+
+    return obj
+
+
 def get_obj(vimtypes=[], name=None):
     try:
         vcenter = get_vcenter()
@@ -91,6 +197,21 @@ def get_objects(vimtypes=[]):
         raise vmpie_exceptions.NotConnectedException
 
 
+def iter_objects(vimtypes=[], page_size=consts.DEFAULT_PAGE_SIZE):
+    """
+    Iterate over all the objects of the given types, retrieving them one page at a time.
+    @param vimtypes: The types of the objects. Defaults to all inventory objects.
+    @type vimtypes: I{list}
+    @param page_size: The maximum number of objects retrieved in a single page.
+    @type page_size: I{int}
+    @return: A generator of pyVmomi objects.
+    @rtype: I{generator}
+    """
+    for page in collector.iter_container_properties(vimtypes or [vim.ManagedEntity], [], page_size=page_size):
+        for obj, _ in page:
+            yield obj
+
+
 def is_vmware_tools_running(vm):
     tools_status = vm._pyVmomiVM.guest.toolsStatus
     if tools_status == 'toolsNotInstalled' or tools_status == 'toolsNotRunning':
@@ -121,30 +242,44 @@ def run_command_in_vm(vm, command, arguments, credentials):
 
 
 def _create_folder_tree(root_folder=None):
+    """
+    Create a tree of the folder hierarchy using a single property collector call.
+    @param root_folder: The folder to start from (name or object). Defaults to the root folder,
+                        which includes all the datacenters.
+    @type root_folder: I{str / vim.Folder / vmpie.folder.Folder}
+    @return: Nested dictionaries of folder names, ie: {'Datacenters': {'dc': {'vm': {'folder': {}}}}}
+    @rtype: I{dict}
+    """
     vcenter = get_vcenter()
-    folders = {}
 
     if root_folder is None:
-        # What if multiple datacenters are available? childEntity[0]...
-        root_folder = folder.Folder('vm',
-                                    _pyVmomiFolder=vcenter._connection.content.rootFolder.childEntity[0].vmFolder)
+        root_folder = vcenter._connection.content.rootFolder
+    elif isinstance(root_folder, folder.Folder):
+        root_folder = root_folder._pyVmomiFolder
+    elif isinstance(root_folder, basestring):
+        root_folder = get_obj_by_name(root_folder, [vim.Folder])
 
-    elif isinstance(root_folder, vim.Folder):
-        root_folder = folder.Folder(root_folder.name, _pyVmomiFolder=root_folder)
-    elif isinstance(root_folder, str):
-        root_folder = folder.Folder(root_folder)
+    hierarchy = collector.retrieve_hierarchy(root_folder, vcenter=vcenter)
+    root_name = hierarchy[root_folder._moId][1]["name"]
 
-    _get_folders_tree(root_folder, folders)
+    return {root_name: _get_folders_tree(root_folder._moId, hierarchy)}
 
-    return folders
 
+def _get_folders_tree(moid, hierarchy):
+    obj, properties = hierarchy[moid]
+    tree = {}
 
-def _get_folders_tree(current_folder, folders):
-    folders[current_folder] = {}
+    if isinstance(obj, vim.Datacenter):
+        children = [properties.get(path) for path in collector.DATACENTER_FOLDERS]
+    else:
+        children = properties.get("childEntity", [])
+
+    for child in children:
+        # Skip entities that aren't folders or datacenters (ie: virtual machines)
+        if child is not None and child._moId in hierarchy:
+            tree[hierarchy[child._moId][1]["name"]] = _get_folders_tree(child._moId, hierarchy)
 
-    for child in current_folder.folders:
-        folders[current_folder.name][child.name] = {}
-        _get_folders_tree(child, folders[current_folder.name])
+    return tree
 
 
 def _get_all_vm_paths():
@@ -172,10 +307,28 @@ def bytes_to_human(size, suffix='B'):
     return "%.1f%f%f" % (size, unit, suffix)
 
 
-def wait_for_task(task):
-    while True:
-        if task.info.state == 'success':
-            return task.info.result
+def wait_for_task(task, timeout=None, vcenter=None):
+    """
+    Block until a task completes, without polling it (See TaskWaiter).
+    @param task: The task.
+    @type task: I{vim.Task / vmpie.task.Task}
+    @param timeout: The maximum number of seconds to wait. None waits until the task completes.
+    @type timeout: I{float}
+    @param vcenter: The vCenter of the task. Defaults to the connected vCenter.
+    @type vcenter: I{vmpie.vcenter.VCenter}
+    @return: The result of the task.
+    @raise vmodl.MethodFault: The error of the task, if it failed.
+    """
+    waiter = task_waiter.TaskWaiter(vcenter)
+    try:
+        results = waiter.wait([task], timeout=timeout)
+    finally:
+        waiter.close()
+
+    if not results:
+        raise vmpie_exceptions.TaskTimeoutException
 
-        if task.info.state == 'error':
-            raise Exception("there was an error")
+    result = results.values()[0]
+    if result.error is not None:
+        raise result.error
+    return result.result
@@ -1,3 +1,4 @@
+import re
 import time
 import base64
 import atexit
@@ -6,22 +7,24 @@ import ssl
 from threading import Thread
 
 from pyVmomi import vim
-from pyVim.connect import SmartConnect, Disconnect
+from pyVim.connect import SmartConnect, Disconnect, GetSi, SetSi
 
 import vmpie
 import consts
 import utils
 import folder
+import datastore
+import collector
+import name_index
+import parent_cache
+import session_pool
+import session_cache
+import task
+import task_feed
+import task_waiter
 import virtual_machine
-import vmpie_exceptions
 
-def connected(func):
-    def wrapper(*args, **kwargs):
-        vcenter = utils.get_vcenter()
-        if vcenter.is_connected():
-            return func(*args, **kwargs)
-        raise vmpie_exceptions.NotConnectedException
-    return wrapper
+from decorators import connected
 
 class VCenter(object):
     """
@@ -38,10 +41,24 @@ class VCenter(object):
         self._name = ""
         self._version = None
         self._os = None
+        self._name_index = None
+        self._name_index_enabled = True
+        self._parent_cache = None
+        self._task_waiter = None
+        self._task_feed = None
+        self._session_pool = None
+        self._last_activity = 0
+        self._cache_session = False
 
-    def connect(self, host, user, passwd):
+    def _login(self, host, user, passwd):
+        """
+        Open a new authenticated session to the vCenter.
+        @return: The service instance of the session, or None if the login failed.
+        @rtype: I{vim.ServiceInstance}
+        """
+        connection = None
         try:
-            self._connection = SmartConnect(
+            connection = SmartConnect(
                 host=host,
                 user=user,
                 pwd=passwd
@@ -55,48 +72,138 @@ class VCenter(object):
         except (vim.fault.HostConnectFault, ssl.SSLError) as exc:
             if '[SSL: CERTIFICATE_VERIFY_FAILED' in str(exc):
                 try:
-                    default_context = ssl._create_default_https_context
-                    ssl._create_default_https_context = ssl._create_unverified_context
-                    self._connection = SmartConnect(
+                    # An explicit context, since patching the global one races with parallel logins (See VCenterGroup)
+                    connection = SmartConnect(
                         host=host,
                         user=user,
-                        pwd=passwd
+                        pwd=passwd,
+                        sslContext=ssl._create_unverified_context()
                     )
-                    ssl._create_default_https_context = default_context
                 except Exception as exc1:
                     raise Exception(exc1)
             else:
                 logging.error("Cannot connect to host, due to an error.", exc_info=True)
                 # TODO: Raise login exception
 
+        return connection
+
+    def connect(self, host, user, passwd, pool_size=consts.SESSION_POOL_SIZE, cache_session=False):
+        """
+        Connect to the vCenter.
+        @param host: The address of the vCenter.
+        @type host: I{str}
+        @param user: The user name.
+        @type user: I{str}
+        @param passwd: The password.
+        @type passwd: I{str}
+        @param pool_size: The maximum number of additional sessions used for parallel operations (See session()).
+        @type pool_size: I{int}
+        @param cache_session: Whether to save the session on disk and reuse it in following processes,
+                              instead of logging in each time. The session isn't logged out on exit.
+        @type cache_session: I{bool}
+        """
+        self._cache_session = cache_session
+
+        if cache_session:
+            self._connection = session_cache.restore(host, user)
+
+        if not self._connection:
+            self._connection = self._login(host, user, passwd)
+
+            if self._connection and cache_session:
+                session_cache.save(host, user, self._connection._stub.cookie)
+
         if self._connection:
-            atexit.register(Disconnect, self._connection)
+            if not cache_session:
+                atexit.register(Disconnect, self._connection)
             self._logged_in = True
             self._host = host
             self._user = user
             self._passwd = base64.b64encode(passwd)
+            self.mark_active()
+            if self._session_pool:
+                self._session_pool.close()
+            self._session_pool = session_pool.SessionPool(self._open_pooled_session, size=pool_size)
+            # Pooled sessions are never cached, so they're always logged out, even if still checked out
+            atexit.register(self._session_pool.close_all)
             self.session_keeper()
             vmpie.set_vcenter(self)
 
-    def is_connected(self):
-        if self._logged_in:
-            if not self._connection.content.sessionManager.currentSession:
-                logging.debug("Session has expired. Renewing session.")
-                self.connect(self._host, self._user, self._passwd)
+    def _open_pooled_session(self):
+        # SmartConnect replaces the global service instance, which should remain the main connection
+        main_connection = GetSi()
+        try:
+            return self._login(self._host, self._user, base64.b64decode(self._passwd))
+        finally:
+            SetSi(main_connection)
+
+    def session(self, timeout=None):
+        """
+        Check out a session from the session pool for a single operation. Objects must be bound to the session
+        in order to send their requests through it.
+        Usage::
+            with vcenter.session() as session:
+                session.bind(vm._pyVmomiVM).PowerOnVM_Task()
+        @param timeout: The maximum number of seconds to wait for a free session. None waits forever.
+        @type timeout: I{float}
+        @return: A context manager of a pooled session.
+        @rtype: I{vmpie.session_pool.Session}
+        """
+        return self._session_pool.session(timeout=timeout)
+
+    def mark_active(self):
+        """
+        Record a successful call to the vCenter, which proves the session is still valid.
+        """
+        self._last_activity = time.time()
 
-                if self._connection:
-                    logging.debug("Renewed session successfully.")
-                else:
-                    logging.debug("Session renewal failed. True connecting again.")
-                    # Raise login exception
+    def is_connected(self):
+        """
+        Check whether the session is valid. The session is assumed to be valid if it was successfully used
+        recently, otherwise it's verified against the server and renewed if it has expired.
+        @rtype: I{bool}
+        """
+        if not self._logged_in:
+            return False
 
+        if time.time() - self._last_activity < consts.SESSION_VALIDITY_TIMEOUT:
             return True
-        return False
+
+        if self._connection.content.sessionManager.currentSession:
+            self.mark_active()
+        else:
+            logging.debug("Session has expired. Renewing session.")
+            self.renew_session()
+
+        return True
+
+    def renew_session(self):
+        """
+        Login again using the same stub, so all the existing pyVmomi objects remain usable.
+        The idle pooled sessions may have expired as well, so they're discarded and following operations
+        open new ones. An expired session that was checked out is discarded once it's returned.
+        """
+        self._connection.content.sessionManager.Login(
+            userName=self._user,
+            password=base64.b64decode(self._passwd)
+        )
+        self.mark_active()
+        logging.debug("Renewed session successfully.")
+
+        if self._session_pool:
+            self._session_pool.discard_idle()
+
+        if self._cache_session:
+            session_cache.save(self._host, self._user, self._connection._stub.cookie)
 
     def _session_keeper_worker(self):
         while True:
             try:
-                self._ping()
+                # Ping only when there was no recent traffic to keep the session alive
+                if time.time() - self._last_activity >= consts.SESSION_KEEPER_TIMEOUT:
+                    self._ping()
+                    self.mark_active()
+                self._session_pool.keep_alive()
             except:
                 pass
             finally:
@@ -111,30 +218,290 @@ class VCenter(object):
         return self._connection.CurrentTime()
 
     def disconnect(self):
+        if self._session_pool:
+            self._session_pool.close()
+        if self._name_index:
+            self._name_index.stop()
+            self._name_index = None
+        if self._task_waiter:
+            self._task_waiter.close()
+            self._task_waiter = None
+        if self._task_feed:
+            self._task_feed.stop()
+            self._task_feed = None
         self._connection.content.sessionManager.Logout()
 
+        if self._cache_session:
+            session_cache.remove(self._host, self._user)
+
+    @property
+    def parent_cache(self):
+        """
+        The cache of the inventory hierarchy, used to compute inventory paths. Loaded in bulk on first use.
+        @rtype: I{vmpie.parent_cache.ParentCache}
+        """
+        if self._parent_cache is None:
+            cache = parent_cache.ParentCache(self)
+            cache.load()
+            self._parent_cache = cache
+
+        return self._parent_cache
+
+    def invalidate_parents(self, task, obj):
+        """
+        Invalidate the cached path of an object once a task that moves or renames it completes.
+        Does nothing if the parent cache wasn't built, so a rename never loads the whole inventory.
+        @param task: The move or rename task.
+        @type task: I{vim.Task / vmpie.task.Task}
+        @param obj: The inventory object.
+        @type obj: I{vim.ManagedEntity}
+        """
+        if self._parent_cache is not None:
+            self._parent_cache.invalidate_after(task, obj)
+
+    @property
+    def name_index(self):
+        """
+        The live name index of the vCenter inventory. Built on first use.
+        @return: The name index, or None if it is unavailable.
+        @rtype: I{vmpie.name_index.NameIndex}
+        """
+        if not self._name_index_enabled:
+            return None
+
+        if self._name_index is None or not self._name_index.is_alive():
+            if self._name_index is not None:
+                # Releases the property collector and view of the dead index
+                self._name_index.stop()
+            index = name_index.NameIndex(self)
+            try:
+                index.start()
+            except Exception:
+                logging.warning("Cannot build the name index, falling back to inventory scans.", exc_info=True)
+                index.stop()
+                self._name_index_enabled = False
+                return None
+            self._name_index = index
+
+        return self._name_index
+
+    @property
+    def task_waiter(self):
+        """
+        A task waiter shared by asynchronous operations, which calls task callbacks from a background thread.
+        @rtype: I{vmpie.task_waiter.TaskWaiter}
+        """
+        if self._task_waiter is None or not self._task_waiter.is_alive():
+            if self._task_waiter is not None:
+                # Resolves whatever the dead waiter was still tracking
+                self._task_waiter.close()
+            waiter = task_waiter.TaskWaiter(self)
+            waiter.start()
+            self._task_waiter = waiter
+
+        return self._task_waiter
+
+    def task_feed(self, kinds=None, predicate=None):
+        """
+        Subscribe to the live events of the vCenter's recent tasks.
+        All the subscriptions share a single property filter on the task manager, ie:
+            with vcenter.task_feed(kinds=[task_feed.ERROR]) as feed:
+                for event in feed:
+                    logging.error(event.task.error)
+        @param kinds: The kinds of events to receive (See task_feed.EVENT_KINDS). Defaults to all kinds.
+        @type kinds: I{list}
+        @param predicate: A function receiving an event, which returns whether to receive it.
+        @type predicate: I{callable}
+        @return: An iterable subscription of task events.
+        @rtype: I{vmpie.task_feed.Subscription}
+        """
+        if self._task_feed is None:
+            self._task_feed = task_feed.TaskFeed(self)
+
+        return self._task_feed.subscribe(kinds=kinds, predicate=predicate)
+
     def get_vm(self, vm_name):
-        return virtual_machine.VirtualMachine(vm_name)
+        return virtual_machine.VirtualMachine(vm_name, _vcenter=self)
+
+    def get_vm_by_uuid(self, uuid, instance_uuid=False):
+        """
+        Get a virtual machine by its UUID using the vCenter search index.
+        @param uuid: The BIOS UUID of the virtual machine.
+        @type uuid: I{str}
+        @param instance_uuid: Whether the given uuid is the vCenter instance UUID rather than the BIOS UUID.
+        @type instance_uuid: I{bool}
+        @rtype: I{vmpie.virtual_machine.VirtualMachine}
+        """
+        vm = utils.find_vm(uuid=uuid, instance_uuid=instance_uuid, vcenter=self)
+        return virtual_machine.VirtualMachine(_pyVmomiVM=vm, _vcenter=self)
+
+    def get_vm_by_ip(self, ip):
+        """
+        Get a virtual machine by the IP address of its guest using the vCenter search index.
+        @param ip: The IP address of the guest.
+        @type ip: I{str}
+        @rtype: I{vmpie.virtual_machine.VirtualMachine}
+        """
+        return virtual_machine.VirtualMachine(_pyVmomiVM=utils.find_vm(ip=ip, vcenter=self), _vcenter=self)
+
+    def get_vm_by_dns(self, dns_name):
+        """
+        Get a virtual machine by the DNS name of its guest using the vCenter search index.
+        @param dns_name: The DNS name of the guest.
+        @type dns_name: I{str}
+        @rtype: I{vmpie.virtual_machine.VirtualMachine}
+        """
+        vm = utils.find_vm(dns_name=dns_name, vcenter=self)
+        return virtual_machine.VirtualMachine(_pyVmomiVM=vm, _vcenter=self)
+
+    def get_vm_by_path(self, inventory_path):
+        """
+        Get a virtual machine by its inventory path using the vCenter search index.
+        @param inventory_path: The inventory path of the virtual machine (ie: "dc/vm/folder/vm_name").
+        @type inventory_path: I{str}
+        @rtype: I{vmpie.virtual_machine.VirtualMachine}
+        """
+        vm = utils.find_vm(inventory_path=inventory_path, vcenter=self)
+        return virtual_machine.VirtualMachine(_pyVmomiVM=vm, _vcenter=self)
+
+    def get_vms(self, vm_names):
+        """
+        Get many virtual machines by their names using a single property collector call.
+        @param vm_names: The names of the virtual machines.
+        @type vm_names: I{list}
+        @return: A dictionary of name to virtual machine, and a list of the names that were not found.
+        @rtype: I{tuple}
+        """
+        found, missing = utils._get_inventory_by_names(
+            vm_names,
+            [vim.VirtualMachine],
+            consts.VM_INVENTORY_PROPERTIES,
+            vcenter=self
+        )
+
+        vms = {}
+        for name, (vm, properties) in found.iteritems():
+            vms[name] = virtual_machine.VirtualMachine(name, _pyVmomiVM=vm, _properties=properties, _vcenter=self)
+
+        return vms, missing
 
     def get_all_vms(self):
-        container_view = self._connection.content.viewManager.CreateContainerView(
-            self._connection.content.rootFolder,
+        """
+        Get all the virtual machines in the vCenter.
+        The inventory properties of all the virtual machines are retrieved in bulk, instead of a round trip
+        per property per virtual machine.
+        @return: All the virtual machines.
+        @rtype: I{list}
+        """
+        return list(self.iter_vms())
+
+    def iter_vms(self, properties=None, page_size=consts.DEFAULT_PAGE_SIZE):
+        """
+        Iterate over all the virtual machines in the vCenter, retrieving them one page at a time.
+        Only a single page is held in memory, and the first virtual machines are available as soon as
+        the first page arrives.
+        @param properties: Additional property paths to retrieve with the inventory properties.
+        @type properties: I{list}
+        @param page_size: The maximum number of virtual machines retrieved in a single page.
+        @type page_size: I{int}
+        @return: A generator of virtual machines.
+        @rtype: I{generator}
+        """
+        path_set = consts.VM_INVENTORY_PROPERTIES + [path for path in properties or []
+                                                     if path not in consts.VM_INVENTORY_PROPERTIES]
+        pages = collector.iter_container_properties(
             [vim.VirtualMachine],
-            True
+            path_set,
+            page_size=page_size,
+            vcenter=self
         )
-        children = container_view.view
+
+        for page in pages:
+            for vm, vm_properties in page:
+                yield virtual_machine.VirtualMachine(vm_properties["name"], _pyVmomiVM=vm, _properties=vm_properties,
+                                                     _vcenter=self)
+
+    def query_vms(self, power_state=None, guest_family=None, folder=None, template=None, name_regex=None,
+                  properties=None):
+        """
+        Find the virtual machines matching all the given criteria.
+        Only the properties required by the criteria are retrieved (in addition to the inventory properties),
+        in a single property collector call, and virtual machine objects are only created for matching rows.
+        @param power_state: The power state of the virtual machines (ie: vim.VirtualMachinePowerState.poweredOn).
+        @type power_state: I{str}
+        @param guest_family: The operating system family of the guests (vmpie.plugin.WINDOWS or vmpie.plugin.UNIX).
+        @type guest_family: I{str}
+        @param folder: Only search in this folder (recursively). Either a name or a folder object.
+        @type folder: I{str / vmpie.folder.Folder / vim.Folder}
+        @param template: Whether the virtual machines are templates.
+        @type template: I{bool}
+        @param name_regex: A regular expression the names of the virtual machines must match.
+        @type name_regex: I{str}
+        @param properties: Additional property paths to retrieve with each virtual machine.
+                           Their values are available through VirtualMachine.get_property.
+        @type properties: I{list}
+        @return: The matching virtual machines.
+        @rtype: I{list}
+        """
+        path_set = list(consts.VM_INVENTORY_PROPERTIES)
+        if power_state is not None:
+            path_set.append("runtime.powerState")
+        for path in properties or []:
+            if path not in path_set:
+                path_set.append(path)
+
+        if isinstance(folder, basestring):
+            folder = utils.get_obj_by_name(folder, [vim.Folder], vcenter=self)
+        elif isinstance(folder, vmpie.folder.Folder):
+            folder = folder._pyVmomiFolder
+
+        name_pattern = re.compile(name_regex) if name_regex is not None else None
         vms = []
 
-        for vm in children:
-            vms.append(virtual_machine.VirtualMachine(vm.name, _pyVmomiVM=vm))
+        for page in collector.iter_container_properties([vim.VirtualMachine], path_set, container=folder,
+                                                        vcenter=self):
+            for vm, vm_properties in page:
+                if power_state is not None and vm_properties.get("runtime.powerState") != power_state:
+                    continue
+
+                if template is not None and bool(vm_properties.get("config.template")) != template:
+                    continue
+
+                if guest_family is not None:
+                    guest_id = vm_properties.get("summary.config.guestId")
+                    if virtual_machine.OPERATING_SYSTEMS.get(guest_id) != guest_family:
+                        continue
+
+                if name_pattern is not None and not name_pattern.search(vm_properties["name"]):
+                    continue
+
+                vms.append(virtual_machine.VirtualMachine(vm_properties["name"], _pyVmomiVM=vm,
+                                                          _properties=vm_properties, _vcenter=self))
 
         return vms
 
+    def get_vms_by_datastore(self, refresh=False):
+        """
+        Get the virtual machines of every datastore using a single property collector call.
+        @param refresh: Whether to refresh the storage info of the datastores first (at most once per TTL).
+        @type refresh: I{bool}
+        @return: A dictionary of datastore managed object id to a list of lightweight virtual machine handles.
+        @rtype: I{dict}
+        """
+        return datastore.get_vms_by_datastore(refresh=refresh, vcenter=self)
+
+    def get_recent_tasks(self):
+        """
+        Get the recent tasks of the vCenter, with their info fetched in a single property collector call.
+        @rtype: I{list of vmpie.task.Task}
+        """
+        return task.Task.load(self._connection.content.taskManager.recentTask, vcenter=self)
+
     def get_folder(self, folder_name):
-        return folder.Folder(folder_name)
+        return folder.Folder(folder_name, _vcenter=self)
 
     def get_vms_by_folder(self, folder_name):
-        return folder.Folder(folder_name).vms
+        return folder.Folder(folder_name, _vcenter=self).vms
 
     def backup(self):
         folders = utils._create_folder_tree()
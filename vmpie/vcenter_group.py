@@ -0,0 +1,146 @@
+# ==================================================================================================================== #
+# File Name     : vcenter_group.py
+# Purpose       : Provide concurrent operations on several vCenters at once.
+# Date Created  : 16/10/2026
+# Author        : Avital Livshits, Cory Levy
+# ==================================================================================================================== #
+# ===================================================== IMPORTS ====================================================== #
+
+import logging
+from multiprocessing.pool import ThreadPool
+
+import vmpie
+import vcenter
+
+# ===================================================== CLASSES ====================================================== #
+
+
+class VCenterGroup(object):
+    """
+    Represent several vCenters that are connected and queried concurrently.
+    Every operation is sent to all the vCenters at once, so it costs the latency of the slowest vCenter
+    instead of the sum of all of them. Virtual machines returned by the group are tagged with their
+    vCenter (See VirtualMachine.vcenter).
+    """
+    def __init__(self):
+        self.vcenters = []
+
+    def connect(self, hosts, user=None, passwd=None, **kwargs):
+        """
+        Connect to all the vCenters in parallel.
+        The connected vCenter (vmpie.vcenter) is set to the first vCenter of the group.
+        @param hosts: The addresses of the vCenters, or (host, user, password) tuples for vCenters
+                      with different credentials.
+        @type hosts: I{list}
+        @param user: The user name, for hosts given without credentials.
+        @type user: I{str}
+        @param passwd: The password, for hosts given without credentials.
+        @type passwd: I{str}
+        @param kwargs: Additional arguments for VCenter.connect.
+        """
+        credentials = [host if isinstance(host, tuple) else (host, user, passwd) for host in hosts]
+
+        def connect(host_credentials):
+            host, host_user, host_passwd = host_credentials
+            vc = vcenter.VCenter()
+            vc.connect(host, host_user, host_passwd, **kwargs)
+
+            if not vc._logged_in:
+                logging.warning("Cannot connect to vCenter {host}.".format(host=host))
+                return None
+            return vc
+
+        self.vcenters = [vc for vc in self._run(connect, credentials) if vc is not None]
+
+        if self.vcenters:
+            vmpie.set_vcenter(self.vcenters[0])
+
+    def disconnect(self):
+        """
+        Disconnect from all the vCenters.
+        """
+        self._run(lambda vc: vc.disconnect(), self.vcenters)
+        self.vcenters = []
+
+    def map(self, func, raise_errors=True):
+        """
+        Call a function on every vCenter concurrently.
+        @param func: A function receiving a vCenter.
+        @type func: I{callable}
+        @param raise_errors: Whether to raise the first error. Otherwise, errors are returned as results.
+        @type raise_errors: I{bool}
+        @return: A dictionary of vCenter to the result of the function.
+        @rtype: I{dict}
+        """
+        def call(vc):
+            try:
+                return func(vc)
+            except Exception as exc:
+                if raise_errors:
+                    raise
+                logging.warning("Operation failed on vCenter {host}.".format(host=vc._host), exc_info=True)
+                return exc
+
+        results = self._run(call, self.vcenters)
+        # Keyed by the vCenter itself, since several vCenters of the group may share a host
+        return dict(zip(self.vcenters, results))
+
+    def get_all_vms(self):
+        """
+        @return: The virtual machines of all the vCenters.
+        @rtype: I{list}
+        """
+        return self._merge(self.map(lambda vc: vc.get_all_vms()))
+
+    def query_vms(self, **criteria):
+        """
+        Find the virtual machines matching the given criteria on all the vCenters (See VCenter.query_vms).
+        @return: The matching virtual machines.
+        @rtype: I{list}
+        """
+        return self._merge(self.map(lambda vc: vc.query_vms(**criteria)))
+
+    def get_vms(self, vm_names):
+        """
+        Get many virtual machines by their names from all the vCenters.
+        @param vm_names: The names of the virtual machines.
+        @type vm_names: I{list}
+        @return: A dictionary of name to virtual machine, and a list of the names that weren't found on any vCenter.
+        @rtype: I{tuple}
+        """
+        vms = {}
+        # Iterate in the group's order, so the first vCenter wins on duplicate names
+        results = self.map(lambda vc: vc.get_vms(vm_names))
+        for vc in self.vcenters:
+            found, _ = results[vc]
+            for name, vm in found.iteritems():
+                vms.setdefault(name, vm)
+
+        missing = []
+        for name in vm_names:
+            if name not in vms and name not in missing:
+                missing.append(name)
+
+        return vms, missing
+
+    def _merge(self, results):
+        merged = []
+        for vc in self.vcenters:
+            merged.extend(results[vc])
+        return merged
+
+    def _run(self, func, items):
+        if not items:
+            return []
+
+        pool = ThreadPool(len(items))
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.close()
+
+    def __str__(self):
+        return '<VCenterGroup: {hosts}>'.format(hosts=", ".join(vc._host for vc in self.vcenters))
+
+    def __repr__(self):
+        return '<VCenterGroup: {hosts}>'.format(hosts=", ".join(vc._host for vc in self.vcenters))
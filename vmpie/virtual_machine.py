@@ -6,8 +6,6 @@
 # ==================================================================================================================== #
 # ===================================================== IMPORTS ====================================================== #
 
-import os
-
 from pyVmomi import vim
 
 import consts
@@ -15,7 +13,7 @@ import folder  # To prevent import loops
 import utils
 import vmpie
 from decorators import connected
-from vmpie.builtin_plugins.remote import RemotePlugin
+from vmpie.builtin_plugins.remote import RemotePlugin, connection_pool
 
 
 # ===================================================== CONSTS ====================================================== #
@@ -123,9 +121,10 @@ class VirtualMachine(object):
     """
     Represent a virtual machine.
     """
-    def __init__(self, vm_name, guest_username=consts.DEFAULT_GUEST_USERNAME,
+    def __init__(self, vm_name=None, guest_username=consts.DEFAULT_GUEST_USERNAME,
                  guest_password=consts.DEFAULT_GUEST_PASSWORD, parent=None,
-                 _pyVmomiVM=None):
+                 _pyVmomiVM=None, _properties=None, uuid=None, ip=None, dns_name=None, inventory_path=None,
+                 _vcenter=None):
         """
         @summary: Initiate the virtual machine object.
         @param vm_name: The name of the virtual machine on ESX server.
@@ -136,39 +135,75 @@ class VirtualMachine(object):
         @type guest password: string
         @param parent: ???
         @type parent: ???
+        @param _properties: Properties of the virtual machine that were already retrieved in bulk,
+                            keyed by their property path (See consts.VM_INVENTORY_PROPERTIES).
+        @type _properties: dict
+        @param uuid: Locate the virtual machine by its BIOS UUID instead of its name.
+        @type uuid: string
+        @param ip: Locate the virtual machine by the IP address of its guest instead of its name.
+        @type ip: string
+        @param dns_name: Locate the virtual machine by the DNS name of its guest instead of its name.
+        @type dns_name: string
+        @param inventory_path: Locate the virtual machine by its inventory path (ie: "dc/vm/folder/vm_name")
+                               instead of its name.
+        @type inventory_path: string
+        @param _vcenter: The vCenter of the virtual machine. Defaults to the connected vCenter.
+        @type _vcenter: vmpie.vcenter.VCenter
         """
         self.name = vm_name
+        self.vcenter = _vcenter or utils.get_vcenter()
         self._parent = None
 
         if isinstance(parent, folder.Folder):
                 self._parent = parent
 
         elif isinstance(parent, vim.Folder):
-            self._parent = folder.Folder(folder_name=parent.name, _pyVmomiFolder=parent)
+            self._parent = folder.Folder(folder_name=parent.name, _pyVmomiFolder=parent, _vcenter=self.vcenter)
 
         if isinstance(_pyVmomiVM, vim.VirtualMachine):
             self._pyVmomiVM = _pyVmomiVM
 
+        elif uuid or ip or dns_name or inventory_path:
+            # Use the server side search index instead of scanning the inventory
+            self._pyVmomiVM = utils.find_vm(uuid=uuid, ip=ip, dns_name=dns_name, inventory_path=inventory_path,
+                                            vcenter=self.vcenter)
+
         else:
             self._pyVmomiVM = utils.get_obj_by_name(
                 name=vm_name,
                 vimtypes=[vim.VirtualMachine],
-                folder=self._parent._pyVmomiFolder if self._parent else None
+                folder=self._parent._pyVmomiFolder if self._parent else None,
+                vcenter=self.vcenter
             )
 
+        if self.name is None:
+            self.name = _properties.get("name") if _properties else self._pyVmomiVM.name
+
         self._moid = self._pyVmomiVM._moId
         self.username = guest_username
         self.password = guest_password
+        self._properties = _properties or {}
+        self._guest_id = None
+
+        if self._properties:
+            # Properties were prefetched, avoid a round trip per property
+            self.template = self._properties.get("config.template")
+            self.os_name = self._properties.get("config.guestFullName")
+            self._vmx = self._properties.get("config.files.vmPathName")
+            self._guest_id = self._properties.get("summary.config.guestId")
 
-        try:
-            self.template = self._pyVmomiVM.config.template
-            self.os_name = self._pyVmomiVM.config.guestFullName
-            self._vmx = self._pyVmomiVM.config.files.vmPathName
-        except AttributeError:
-            # TODO: Usually cause when a vm doesnt exist anymore. What should we do?
-            pass
+        else:
+            try:
+                self.template = self._pyVmomiVM.config.template
+                self.os_name = self._pyVmomiVM.config.guestFullName
+                self._vmx = self._pyVmomiVM.config.files.vmPathName
+                self._guest_id = self._pyVmomiVM.summary.config.guestId
+            except AttributeError:
+                # TODO: Usually cause when a vm doesnt exist anymore. What should we do?
+                pass
 
         # TODO: Find a better way to do that
+        # Creating the plugin is cheap, the guest is only connected on first use of vm.remote
         self.remote = RemotePlugin(self)
 
         # Load collected plugins if they're compatible with the guest OS
@@ -187,10 +222,26 @@ class VirtualMachine(object):
         @return: Whether the plugin is compatible with the guest OS or not.
         @rtype: I{boolean}
         """
-        if not OPERATING_SYSTEMS.get(self._pyVmomiVM.summary.config.guestId):
-            raise Exception("Operating system unknown: {}.".format(self._pyVmomiVM.summary.config.guestId))
+        if not OPERATING_SYSTEMS.get(self._guest_id):
+            raise Exception("Operating system unknown: {}.".format(self._guest_id))
+
+        return OPERATING_SYSTEMS.get(self._guest_id) in plugin._os
+
+    def get_property(self, path):
+        """
+        Get a property of the virtual machine by its path (ie: "runtime.powerState").
+        Properties that were retrieved in bulk are returned without a round trip.
+        @param path: The property path.
+        @type path: I{string}
+        @return: The value of the property.
+        """
+        if path in self._properties:
+            return self._properties[path]
 
-        return OPERATING_SYSTEMS.get(self._pyVmomiVM.summary.config.guestId) in plugin._os
+        value = self._pyVmomiVM
+        for attribute in path.split("."):
+            value = getattr(value, attribute)
+        return value
 
     def load_plugin(self, plugin):
         """
@@ -200,21 +251,25 @@ class VirtualMachine(object):
         """
         setattr(self, plugin._name, plugin(self))
 
+    @property
+    def _pyro_daemon(self):
+        """
+        The connection to the Pyro server on the guest, made on first use.
+        @rtype: Pyro4.Proxy
+        """
+        return connection_pool.get(self)
+
     @property
     @connected
     def parent(self):
         if not isinstance(self._parent, folder.Folder) or self._parent._moId != self._pyVmomiVM.parent._moId:
-            self._parent = folder.Folder(folder_name=self._pyVmomiVM.parent.name, _pyVmomiFolder=self._pyVmomiVM.parent)
+            self._parent = folder.Folder(folder_name=self._pyVmomiVM.parent.name, _pyVmomiFolder=self._pyVmomiVM.parent,
+                                         _vcenter=self.vcenter)
         return self._parent
 
     @property
     def path(self):
-        path = []
-        current_object = self
-        while current_object.parent:
-            path.append(current_object.name)
-            current_object = current_object.parent
-        self._path = os.path.join(*path[::-1])
+        self._path = self.vcenter.parent_cache.path(self._pyVmomiVM)
         return self._path
 
     def __str__(self):
@@ -222,3 +277,38 @@ class VirtualMachine(object):
 
     def __repr__(self):
         return '<Vm: {vm_name}>'.format(vm_name=self.name)
+
+
+class VirtualMachineHandle(object):
+    """
+    A lightweight reference to a virtual machine, which doesn't retrieve anything from the server.
+    Use load() to get the full virtual machine object.
+    """
+    __slots__ = ["name", "_pyVmomiVM", "_moid", "_vcenter"]
+
+    def __init__(self, vm_name, _pyVmomiVM, _vcenter=None):
+        """
+        @param vm_name: The name of the virtual machine.
+        @type vm_name: string
+        @param _pyVmomiVM: The pyVmomi object of the virtual machine.
+        @type _pyVmomiVM: vim.VirtualMachine
+        @param _vcenter: The vCenter of the virtual machine. Defaults to the connected vCenter.
+        @type _vcenter: vmpie.vcenter.VCenter
+        """
+        self.name = vm_name
+        self._pyVmomiVM = _pyVmomiVM
+        self._moid = _pyVmomiVM._moId
+        self._vcenter = _vcenter
+
+    def load(self):
+        """
+        @return: The full virtual machine object.
+        @rtype: I{VirtualMachine}
+        """
+        return VirtualMachine(self.name, _pyVmomiVM=self._pyVmomiVM, _vcenter=self._vcenter)
+
+    def __str__(self):
+        return '<Vm: {vm_name}>'.format(vm_name=self.name)
+
+    def __repr__(self):
+        return '<Vm: {vm_name}>'.format(vm_name=self.name)
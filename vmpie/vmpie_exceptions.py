@@ -27,3 +27,17 @@ class InvalidStateException(Exception):
 
     def __init__(self, message=message, state="Not specified"):
         super(InvalidStateException, self).__init__(message.format(state=state))
+
+
+class TaskTimeoutException(Exception):
+    message = "Timed out waiting for the task."
+
+    def __init__(self):
+        super(TaskTimeoutException, self).__init__(self.message)
+
+
+class TaskWaiterStoppedException(Exception):
+    message = "The task waiter stopped tracking the task: {reason}"
+
+    def __init__(self, message=message, reason="The waiter was closed."):
+        super(TaskWaiterStoppedException, self).__init__(message.format(reason=reason))